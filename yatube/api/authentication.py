@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.lru import LRUCache
+
+CACHE_TTL = getattr(settings, 'API_TOKEN_CACHE_TTL', 300)
+LOCAL_TTL = getattr(settings, 'API_TOKEN_LOCAL_TTL', 5)
+LOCAL_SIZE = getattr(settings, 'API_TOKEN_LOCAL_SIZE', 1024)
+
+local_tokens = LRUCache(maxsize=LOCAL_SIZE, ttl=LOCAL_TTL)
+
+
+def token_cache_key(key):
+    return f'api:token:{key}'
+
+
+def forget_token(key):
+    local_tokens.delete(key)
+    cache.delete(token_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication, запоминающая пару токен — пользователь.
+
+    Сначала смотрит в LRU процесса с коротким временем жизни, затем в общий
+    кэш и только потом идёт в базу. Записи сбрасываются сигналами из
+    api.signals при удалении токена и изменении пользователя.
+    """
+
+    def authenticate_credentials(self, key):
+        token = local_tokens.get(key)
+        if token is None:
+            token = cache.get(token_cache_key(key))
+            if token is None:
+                model = self.get_model()
+                try:
+                    token = model.objects.select_related('user').get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                cache.set(token_cache_key(key), token, CACHE_TTL)
+            local_tokens.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+
+        return (token.user, token)
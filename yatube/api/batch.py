@@ -0,0 +1,54 @@
+import re
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from posts.objects import archived_post_cache, post_cache
+
+BATCH_LIMIT = getattr(settings, 'POSTS_BATCH_LIMIT', 300)
+# str.isdigit() пропускает и '²', и '١' — нужны только цифры ASCII
+ID_RE = re.compile(r'[0-9]+')
+
+
+def parse_ids(values):
+    """Разбирает ids=1,2,3 (или повторяющийся ids), сохраняя порядок.
+
+    Лишние id не разбираются: ошибка поднимается на первом сверх лимита.
+    """
+    ids = []
+    seen = set()
+    for value in values:
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            if not ID_RE.fullmatch(part):
+                raise ValidationError({'ids': f'Некорректный id: {part}.'})
+            pk = int(part)
+            if pk in seen:
+                continue
+            if len(ids) == BATCH_LIMIT:
+                raise ValidationError(
+                    {'ids': f'Не больше {BATCH_LIMIT} id за запрос.'}
+                )
+            seen.add(pk)
+            ids.append(pk)
+    if not ids:
+        raise ValidationError({'ids': 'Укажите хотя бы один id.'})
+    return ids
+
+
+def get_posts(ids):
+    """Возвращает посты по ids в том же порядке и список ненайденных.
+
+    Посты берутся из общего кэша объектов (авторы подставляются из кэша
+    пользователей, поэтому правка поста или переименование автора видны
+    сразу), не нашедшиеся — из кэша архивных постов.
+    """
+    found = post_cache.get_many(ids)
+    cold = [pk for pk in ids if pk not in found]
+    if cold:
+        found.update(archived_post_cache.get_many(cold))
+    posts = [found[pk] for pk in ids if pk in found]
+    missing = [pk for pk in ids if pk not in found]
+    return posts, missing
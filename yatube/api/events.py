@@ -0,0 +1,114 @@
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.models import Change
+from api.serializers import PostSerializer
+from api.sync import current_token
+from posts.models import Post
+
+RING_SIZE = getattr(settings, 'SSE_RING_SIZE', 1000)
+HEARTBEAT = getattr(settings, 'SSE_HEARTBEAT', 15)
+POLL_INTERVAL = getattr(settings, 'SSE_POLL_INTERVAL', 1)
+MAX_DURATION = getattr(settings, 'SSE_MAX_DURATION', 300)
+SHARED_LOG = getattr(settings, 'SSE_SHARED_LOG', True)
+BATCH_SIZE = 100
+EVENT_ID_RE = re.compile(r'[0-9]+')
+
+
+class EventBus:
+    """Шина событий процесса с кольцевым буфером последних событий."""
+
+    def __init__(self, size=RING_SIZE):
+        self.events = deque(maxlen=size)
+        self.condition = threading.Condition()
+
+    def publish(self, event_id, payload):
+        with self.condition:
+            self.events.append((event_id, payload))
+            self.condition.notify_all()
+
+    def last_id(self):
+        return self.events[-1][0] if self.events else 0
+
+    def since(self, event_id):
+        with self.condition:
+            return [event for event in self.events if event[0] > event_id]
+
+    def wait(self, event_id, timeout):
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.last_id() > event_id, timeout
+            )
+
+
+bus = EventBus()
+
+
+def post_payload(post):
+    return dict(PostSerializer(post).data)
+
+
+def publish_post(event_id, post):
+    bus.publish(event_id, post_payload(post))
+
+
+def load_events(last_id):
+    """Новые события после last_id.
+
+    С общим журналом источником истины служит таблица api.Change: так
+    поток видит посты, созданные любым воркером. Кольцевой буфер при этом
+    избавляет от повторной выборки постов, опубликованных в этом процессе.
+    """
+    if not SHARED_LOG:
+        return bus.since(last_id)
+    changes = list(Change.objects.filter(
+        pk__gt=last_id, model='post', action=Change.CREATED,
+    ).values_list('pk', 'object_id')[:BATCH_SIZE])
+    if not changes:
+        return []
+    local = dict(bus.since(changes[0][0] - 1))
+    missing = [object_id for pk, object_id in changes if pk not in local]
+    posts = {}
+    if missing:
+        posts = {post.pk: post_payload(post) for post in
+                 Post.objects.select_related('author').filter(
+                     pk__in=missing)}
+    events = []
+    for pk, object_id in changes:
+        payload = local.get(pk) or posts.get(object_id)
+        events.append((pk, payload))
+    return events
+
+
+def initial_id(request):
+    last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+    if EVENT_ID_RE.fullmatch(last_event_id):
+        return int(last_event_id)
+    return current_token() if SHARED_LOG else bus.last_id()
+
+
+def format_event(event_id, payload):
+    data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f'id: {event_id}\nevent: post\ndata: {data}\n\n'
+
+
+def stream(last_id, accept):
+    """Бесконечный (в пределах MAX_DURATION) поток событий в формате SSE."""
+    started = last_write = time.monotonic()
+    yield 'retry: 3000\n\n'
+    while time.monotonic() - started < MAX_DURATION:
+        for event_id, payload in load_events(last_id):
+            last_id = event_id
+            if payload is not None and accept(payload):
+                last_write = time.monotonic()
+                yield format_event(event_id, payload)
+        if time.monotonic() - last_write >= HEARTBEAT:
+            last_write = time.monotonic()
+            yield ': heartbeat\n\n'
+        bus.wait(last_id, POLL_INTERVAL)
@@ -0,0 +1,89 @@
+from datetime import datetime, time
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+INDEXED_FILTERS = ('group', 'author', 'since', 'until')
+UNINDEXED_FILTERS = ('has_image',)
+FILTERS = INDEXED_FILTERS + UNINDEXED_FILTERS
+LARGE_TABLE_ROWS = getattr(settings, 'POSTS_API_LARGE_TABLE_ROWS', 100000)
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def parse_moment(name, value):
+    try:
+        moment = parse_datetime(value)
+        day = None if moment else parse_date(value)
+    except ValueError:
+        moment = day = None
+    if moment is None and day is None:
+        raise ValidationError(
+            {name: 'Ожидается дата или дата и время в формате ISO 8601.'}
+        )
+    if moment is None:
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        try:
+            moment = timezone.make_aware(moment)
+        except pytz.InvalidTimeError:
+            # при переводе часов такого местного времени нет или оно
+            # встречается дважды
+            raise ValidationError(
+                {name: 'Неоднозначное местное время, укажите смещение.'}
+            )
+    return moment
+
+
+def parse_flag(name, value):
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValidationError({name: 'Ожидается true или false.'})
+
+
+def estimate_rows(model):
+    # max(pk) читается из индекса первичного ключа, COUNT(*) — полный скан
+    return model.objects.order_by('-pk').values_list('pk', flat=True).first()
+
+
+def filter_posts(queryset, params):
+    """Фильтрует посты только по индексированным полям."""
+    used = [name for name in FILTERS
+            if params.get(name) not in (None, '')]
+    if not used:
+        return queryset
+    if (not set(used) & set(INDEXED_FILTERS)
+            and (estimate_rows(queryset.model) or 0) > LARGE_TABLE_ROWS):
+        raise ValidationError(
+            {'non_field_errors': 'Фильтр has_image нужно сочетать с '
+                                 'group, author, since или until.'}
+        )
+
+    if 'group' in used:
+        queryset = queryset.filter(group__slug=params['group'])
+    if 'author' in used:
+        queryset = queryset.filter(author__username=params['author'])
+
+    since = until = None
+    if 'since' in used:
+        since = parse_moment('since', params['since'])
+        queryset = queryset.filter(pub_date__gte=since)
+    if 'until' in used:
+        until = parse_moment('until', params['until'])
+        queryset = queryset.filter(pub_date__lt=until)
+    if since and until and since > until:
+        raise ValidationError({'until': 'Должно быть позже since.'})
+
+    if 'has_image' in used:
+        if parse_flag('has_image', params['has_image']):
+            queryset = queryset.exclude(image='')
+        else:
+            queryset = queryset.filter(image='')
+    return queryset
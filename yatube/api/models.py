@@ -0,0 +1,28 @@
+from django.db import models
+
+
+class Change(models.Model):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = (
+        (CREATED, 'Создан'),
+        (UPDATED, 'Изменён'),
+        (DELETED, 'Удалён'),
+    )
+    MODELS = (
+        ('post', 'Пост'),
+        ('comment', 'Комментарий'),
+        ('group', 'Группа'),
+    )
+
+    model = models.CharField('Модель', max_length=20, choices=MODELS)
+    object_id = models.PositiveIntegerField('ID объекта')
+    action = models.CharField('Действие', max_length=20, choices=ACTIONS)
+    changed = models.DateTimeField('Дата изменения', auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} {self.action}'
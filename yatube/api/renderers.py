@@ -0,0 +1,17 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Позволяет клиентам EventSource получать ошибки в виде события."""
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        data = json.dumps(data, ensure_ascii=False)
+        return f'event: error\ndata: {data}\n\n'.encode()
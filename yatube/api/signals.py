@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import forget_token
+from api.events import publish_post
+from api.models import Change
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def token_changed(sender, instance, **kwargs):
+    forget_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # вход обновляет только last_login — закэшированным токенам он не важен
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list(
+            'key', flat=True):
+        forget_token(key)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Group)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    change = Change.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        action=Change.CREATED if created else Change.UPDATED,
+    )
+    if created and sender is Post:
+        transaction.on_commit(lambda: publish_post(change.pk, instance))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Group)
+def log_delete(sender, instance, **kwargs):
+    Change.objects.create(model=sender._meta.model_name,
+                          object_id=instance.pk,
+                          action=Change.DELETED)
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import ValidationError
+
+from api.models import Change
+from api.serializers import (CommentSerializer, GroupSerializer,
+                             PostSerializer)
+from posts.models import ArchivedComment, ArchivedPost, Comment, Group, Post
+
+SYNC_LIMIT = 500
+
+# рабочая выборка, архивная (перенос в архив журнал не пишет) и сериализатор
+SYNC_MODELS = OrderedDict((
+    ('post', (Post.objects.select_related('author'),
+              ArchivedPost.objects.select_related('author'),
+              PostSerializer, 'posts')),
+    ('comment', (Comment.objects.select_related('author'),
+                 ArchivedComment.objects.select_related('author'),
+                 CommentSerializer, 'comments')),
+    ('group', (Group.objects.all(), None, GroupSerializer, 'groups')),
+))
+
+
+def current_token():
+    return Change.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+
+
+def parse_token(value):
+    try:
+        token = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({'since': 'Некорректный токен синхронизации.'})
+    if token < 0:
+        raise ValidationError({'since': 'Некорректный токен синхронизации.'})
+    return token
+
+
+def changes_since(token, limit=SYNC_LIMIT):
+    """Собирает изменения после token одним проходом по журналу.
+
+    Несколько записей об одном объекте схлопываются в последнюю, так что
+    клиент получает актуальное состояние или метку удаления. Объекты,
+    которые успели уйти в архив, берутся из архивных таблиц; не
+    найденные нигде считаются удалёнными.
+    """
+    batch = list(Change.objects.filter(pk__gt=token)
+                 .values_list('pk', 'model', 'object_id', 'action')
+                 [:limit + 1])
+    more = len(batch) > limit
+    batch = batch[:limit]
+
+    latest = {name: {} for name in SYNC_MODELS}
+    for _, model, object_id, action in batch:
+        latest[model][object_id] = action
+
+    result = {
+        'token': batch[-1][0] if batch else token,
+        'more': more,
+        'deleted': {},
+    }
+    for name, (queryset, archive, serializer, key) in SYNC_MODELS.items():
+        alive = [object_id for object_id, action in latest[name].items()
+                 if action != Change.DELETED]
+        deleted = [object_id for object_id, action in latest[name].items()
+                   if action == Change.DELETED]
+        objects = list(queryset.filter(pk__in=alive)) if alive else []
+        found = {obj.pk for obj in objects}
+        cold = [object_id for object_id in alive if object_id not in found]
+        if cold and archive is not None:
+            objects += archive.filter(pk__in=cold)
+            found.update(obj.pk for obj in objects)
+        objects.sort(key=lambda obj: obj.pk)
+        result[key] = serializer(objects, many=True).data
+        result['deleted'][key] = sorted(
+            deleted + [object_id for object_id in alive
+                       if object_id not in found])
+    return result
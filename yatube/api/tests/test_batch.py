@@ -0,0 +1,80 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from api.batch import parse_ids
+from posts.models import Post
+
+User = get_user_model()
+
+URL = '/api/v1/posts/batch/'
+
+
+class PostBatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [Post.objects.create(author=cls.user, text=f'Пост {i}')
+                     for i in range(5)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(PostBatchTest.user)
+
+    def test_preserves_order_and_reports_missing(self):
+        ids = [PostBatchTest.posts[3].pk, 999, PostBatchTest.posts[0].pk]
+        # посты, их авторы и ненайденный id — ещё и в архиве
+        with self.assertNumQueries(3):
+            response = self.client.get(URL, {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual([post['id'] for post in data['results']],
+                         [ids[0], ids[2]])
+        self.assertEqual(data['results'][0]['author'], 'author')
+        self.assertEqual(data['missing'], [999])
+
+    def test_second_request_served_from_cache(self):
+        ids = ','.join(str(post.pk) for post in PostBatchTest.posts)
+        self.client.get(URL, {'ids': ids})
+        with self.assertNumQueries(0):
+            response = self.client.get(URL, {'ids': ids})
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_edit_invalidates_cache(self):
+        post = PostBatchTest.posts[0]
+        self.client.get(URL, {'ids': post.pk})
+        post.text = 'Изменённый'
+        post.save()
+        response = self.client.get(URL, {'ids': post.pk})
+        self.assertEqual(response.json()['results'][0]['text'], 'Изменённый')
+
+    def test_author_rename_visible(self):
+        post = PostBatchTest.posts[0]
+        self.client.get(URL, {'ids': post.pk})
+        author = User.objects.get(pk=PostBatchTest.user.pk)
+        author.username = 'renamed'
+        author.save()
+        response = self.client.get(URL, {'ids': post.pk})
+        self.assertEqual(response.json()['results'][0]['author'], 'renamed')
+
+    @mock.patch('api.batch.BATCH_LIMIT', 2)
+    def test_limit_checked_while_parsing(self):
+        self.assertEqual(parse_ids(['1,2,1', '2']), [1, 2])
+        # хвост после лимита не разбирается
+        with self.assertRaisesMessage(ValidationError, 'Не больше 2 id'):
+            parse_ids(['1,2,3,x'])
+
+    @mock.patch('api.batch.BATCH_LIMIT', 2)
+    def test_invalid_ids(self):
+        for ids in ('', 'a,b', '1,2,3', '²', '١', '1,-2'):
+            with self.subTest(ids=ids):
+                response = self.client.get(URL, {'ids': ids})
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Post
+from posts.objects import post_cache
+
+User = get_user_model()
+
+
+class CommentViewSetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        cls.comments = [
+            Comment.objects.create(author=User.objects.create_user(
+                username=f'user{i}'), post=cls.post, text=f'Комментарий {i}')
+            for i in range(5)
+        ]
+        cls.url = f'/api/v1/posts/{cls.post.pk}/comments/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CommentViewSetTest.user)
+
+    def test_list_single_query_and_ordered(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(CommentViewSetTest.url)
+        self.assertEqual(
+            [comment['id'] for comment in response.json()],
+            [comment.pk for comment in CommentViewSetTest.comments],
+        )
+        self.assertEqual(response.json()[0]['author'], 'user0')
+
+    def test_detail_single_query(self):
+        comment = CommentViewSetTest.comments[0]
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'{CommentViewSetTest.url}{comment.pk}/')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_create_reads_post_from_cache(self):
+        post_cache.get(pk=CommentViewSetTest.post.pk)
+        # вставка комментария и запись в журнал синхронизации
+        with self.assertNumQueries(2):
+            response = self.client.post(CommentViewSetTest.url,
+                                        {'text': 'Новый'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()['post'], CommentViewSetTest.post.pk)
+
+    def test_missing_post(self):
+        missing = '/api/v1/posts/999/comments/'
+        self.assertEqual(self.client.get(missing).status_code,
+                         HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.client.post(missing, {'text': 'Новый'})
+                         .status_code, HTTPStatus.NOT_FOUND)
+
+    def test_comment_of_other_post_not_found(self):
+        other = Post.objects.create(author=CommentViewSetTest.user,
+                                    text='Другой')
+        comment = CommentViewSetTest.comments[0]
+        response = self.client.get(
+            f'/api/v1/posts/{other.pk}/comments/{comment.pk}/')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,105 @@
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from rest_framework.test import APIClient
+
+from api.events import EventBus, bus, initial_id
+from api.sync import current_token
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+URL = '/api/v1/events/'
+
+
+def read_events(response, count):
+    events = []
+    for chunk in response.streaming_content:
+        chunk = chunk.decode()
+        if chunk.startswith('id:'):
+            lines = dict(line.split(': ', 1)
+                         for line in chunk.splitlines() if line)
+            events.append((int(lines['id']), json.loads(lines['data'])))
+            if len(events) == count:
+                break
+    response.close()
+    return events
+
+
+@mock.patch('api.events.POLL_INTERVAL', 0.01)
+@mock.patch('api.events.MAX_DURATION', 0.2)
+class EventStreamTest(TestCase):
+    def setUp(self):
+        bus.events.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.start = self.client.get('/api/v1/sync/').json()['token']
+
+    def get(self, **params):
+        response = self.client.get(URL, params,
+                                   HTTP_LAST_EVENT_ID=str(self.start))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response
+
+    def test_global_stream_resumes_from_last_event_id(self):
+        posts = [Post.objects.create(author=self.author, text=str(i))
+                 for i in range(2)]
+        events = read_events(self.get(), 2)
+        self.assertEqual([payload['id'] for _, payload in events],
+                         [post.pk for post in posts])
+        self.start = events[0][0]
+        events = read_events(self.get(), 1)
+        self.assertEqual(events[0][1]['id'], posts[1].pk)
+
+    def test_group_and_following_filters(self):
+        Post.objects.create(author=self.user, text='Без группы')
+        in_group = Post.objects.create(author=self.user, text='В группе',
+                                       group=self.group)
+        Follow.objects.create(user=self.user, author=self.author)
+        followed = Post.objects.create(author=self.author, text='Подписка')
+        self.assertEqual(
+            [payload['id'] for _, payload in
+             read_events(self.get(group='group'), 5)],
+            [in_group.pk],
+        )
+        self.assertEqual(
+            [payload['id'] for _, payload in
+             read_events(self.get(following='1'), 5)],
+            [followed.pk],
+        )
+
+    def test_bad_last_event_id_starts_from_now(self):
+        Post.objects.create(author=self.author, text='Пост')
+        for value in ('²', '١', '-1', 'abc'):
+            with self.subTest(value=value):
+                request = RequestFactory().get(
+                    URL, HTTP_LAST_EVENT_ID=value)
+                self.assertEqual(initial_id(request), current_token())
+        request = RequestFactory().get(URL, HTTP_LAST_EVENT_ID='7')
+        self.assertEqual(initial_id(request), 7)
+
+    def test_event_stream_accept_header(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(URL, HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertTrue(response.content.startswith(b'event: error'))
+
+
+class EventBusTest(TestCase):
+    def test_ring_buffer_is_bounded(self):
+        ring = EventBus(size=3)
+        for event_id in range(1, 6):
+            ring.publish(event_id, {'id': event_id})
+        self.assertEqual([event_id for event_id, _ in ring.since(0)],
+                         [3, 4, 5])
+        self.assertEqual([event_id for event_id, _ in ring.since(4)], [5])
+        self.assertTrue(ring.wait(4, 0))
+        self.assertFalse(ring.wait(5, 0))
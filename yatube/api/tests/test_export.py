@@ -0,0 +1,63 @@
+import gzip
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+URL = '/api/v1/export/'
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост',
+                                       group=cls.group)
+        cls.comment = Comment.objects.create(author=cls.user, post=cls.post,
+                                             text='Комментарий')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(ExportTest.admin)
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        records = [json.loads(line)
+                   for line in self.read(response).decode().splitlines()]
+        self.assertEqual([record['type'] for record in records],
+                         ['post', 'comment'])
+        self.assertEqual(records[0]['author'], 'author')
+        self.assertEqual(records[0]['group'], 'test-slug')
+        self.assertEqual(records[1]['post'], ExportTest.post.pk)
+
+    def test_export_gzip_and_type(self):
+        response = self.client.get(URL, {'gzip': '1', 'type': 'comment'})
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['text'], 'Комментарий')
+
+    def test_export_unknown_type(self):
+        response = self.client.get(URL, {'type': 'user'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_export_admin_only(self):
+        self.client.force_authenticate(ExportTest.user)
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
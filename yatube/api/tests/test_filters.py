@@ -0,0 +1,80 @@
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+URL = '/api/v1/posts/'
+
+
+class PostFilterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(author=cls.user, text='Старый',
+                                           group=cls.group)
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=10)
+        )
+        cls.new_post = Post.objects.create(author=cls.other, text='Новый',
+                                           image='posts/small.gif')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(PostFilterTest.user)
+
+    def get_ids(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [post['id'] for post in response.json()]
+
+    def test_filters(self):
+        old = PostFilterTest.old_post.pk
+        new = PostFilterTest.new_post.pk
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        cases = {
+            'group': ({'group': 'test-slug'}, [old]),
+            'author': ({'author': 'other'}, [new]),
+            'since': ({'since': since}, [new]),
+            'until': ({'until': since}, [old]),
+            'has_image': ({'has_image': 'true', 'author': 'other'}, [new]),
+            'no_image': ({'has_image': 'false', 'since': since}, []),
+            'none': ({}, [new, old]),
+        }
+        for name, (params, expected) in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.get_ids(**params), expected)
+
+    def test_invalid_values(self):
+        for params in ({'since': 'вчера'}, {'has_image': 'может'},
+                       {'since': '2021-12-10', 'until': '2021-12-01'},
+                       # перевод часов в Europe/Moscow
+                       {'since': '2010-03-28T02:30:00'},
+                       {'since': '2010-10-31T02:30:00'}):
+            with self.subTest(params=params):
+                response = self.client.get(URL, params)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.BAD_REQUEST)
+
+    @mock.patch('api.filters.LARGE_TABLE_ROWS', 0)
+    def test_unindexed_filter_rejected_on_large_table(self):
+        response = self.client.get(URL, {'has_image': 'true'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_unindexed_filter_allowed_on_small_table(self):
+        self.assertEqual(self.get_ids(has_image='true'),
+                         [PostFilterTest.new_post.pk])
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.sync import changes_since
+from posts.archive import archive_posts
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+URL = '/api/v1/sync/'
+
+
+class SyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.token = self.client.get(URL).json()['token']
+
+    def sync(self, token):
+        response = self.client.get(URL, {'since': token})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.json()
+
+    def test_created_updated_and_deleted(self):
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        post = Post.objects.create(author=self.user, text='Первый',
+                                   group=group)
+        post.text = 'Изменён'
+        post.save()
+        comment = Comment.objects.create(author=self.user, post=post,
+                                         text='Комментарий')
+        data = self.sync(self.token)
+        self.assertEqual([item['text'] for item in data['posts']],
+                         ['Изменён'])
+        self.assertEqual([item['id'] for item in data['comments']],
+                         [comment.pk])
+        self.assertEqual([item['slug'] for item in data['groups']],
+                         ['group'])
+
+        response = self.client.delete(f'/api/v1/posts/{post.pk}/')
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        delta = self.sync(data['token'])
+        self.assertEqual(delta['posts'], [])
+        self.assertEqual(delta['deleted']['posts'], [post.pk])
+        self.assertEqual(delta['deleted']['comments'], [comment.pk])
+
+    def test_no_changes(self):
+        data = self.sync(self.token)
+        self.assertEqual(data['token'], self.token)
+        self.assertEqual(data['posts'], [])
+        self.assertFalse(data['more'])
+
+    def test_batches_continue_from_token(self):
+        posts = [Post.objects.create(author=self.user, text=str(i))
+                 for i in range(3)]
+        first = changes_since(self.token, limit=2)
+        self.assertTrue(first['more'])
+        second = changes_since(first['token'], limit=2)
+        self.assertFalse(second['more'])
+        self.assertEqual(
+            [item['id'] for item in first['posts'] + second['posts']],
+            [post.pk for post in posts],
+        )
+
+    def test_archived_within_window(self):
+        post = Post.objects.create(author=self.user, text='Пост')
+        comment = Comment.objects.create(author=self.user, post=post,
+                                         text='Комментарий')
+        archive_posts(timezone.now() + timedelta(seconds=1))
+        data = self.sync(self.token)
+        self.assertEqual([item['text'] for item in data['posts']], ['Пост'])
+        self.assertEqual([item['id'] for item in data['comments']],
+                         [comment.pk])
+        self.assertEqual(data['deleted']['posts'], [])
+
+    def test_invalid_token(self):
+        response = self.client.get(URL, {'since': 'abc'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,29 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from core.throttling import consume, get_ident
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ведро токенов из core.throttling для API.
+
+    Изменяющие запросы идут в ведро write, остальные — в то, что вернёт
+    view.get_throttle_scope(request), если такой метод есть.
+    """
+
+    def get_scope(self, request, view):
+        if request.method not in SAFE_METHODS:
+            return 'write'
+        get_throttle_scope = getattr(view, 'get_throttle_scope', None)
+        return get_throttle_scope(request) if get_throttle_scope else None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        self.wait_seconds = consume(scope, get_ident(request))
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
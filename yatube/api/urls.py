@@ -1,4 +1,5 @@
-from api.views import CommentViewSet, GroupViewSet, PostViewSet
+from api.views import (CommentViewSet, GroupViewSet, PostViewSet, events,
+                       export, follow, sync, unfollow)
 from django.urls import include, path
 from rest_framework.authtoken import views
 from rest_framework.routers import SimpleRouter
@@ -11,5 +12,11 @@ router.register(r'posts/(?P<post_id>\d+)/comments',
 
 urlpatterns = [
     path('v1/', include(router.urls)),
-    path('v1/api-token-auth/', views.obtain_auth_token),
+    path('v1/api-token-auth/', views.obtain_auth_token,
+         name='api-token-auth'),
+    path('v1/export/', export, name='export'),
+    path('v1/sync/', sync, name='sync'),
+    path('v1/events/', events, name='events'),
+    path('v1/follow/', follow, name='follow'),
+    path('v1/unfollow/', unfollow, name='unfollow'),
 ]
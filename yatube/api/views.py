@@ -1,37 +1,168 @@
+from api.batch import get_posts, parse_ids
+from api.events import initial_id, stream
+from api.filters import FILTERS, filter_posts
 from api.serializers import CommentSerializer, GroupSerializer
-from api.serializers import PostSerializer
+from api.serializers import BulkFollowSerializer, PostSerializer
+from api.sync import changes_since, current_token, parse_token
 from api.permissions import IsOwnerOrReadOnly
-from posts.models import Group, Post
+from api.renderers import EventStreamRenderer
+from posts.export import EXPORTS, encode_stream, export_lines
+from posts.follows import bulk_follow, bulk_unfollow
+from posts.models import Comment, Follow, Group, Post
+from posts.objects import archived_post_cache, group_cache, post_cache
 
-from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes)
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import (SAFE_METHODS, IsAdminUser,
+                                        IsAuthenticated)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
 
 class PostViewSet(viewsets.ModelViewSet):
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related('author')
     serializer_class = PostSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_posts(queryset, self.request.query_params)
+        return queryset
+
+    def get_throttle_scope(self, request):
+        if self.action == 'batch':
+            return 'list'
+        if self.action != 'list':
+            return None
+        if any(request.query_params.get(name) for name in FILTERS):
+            return 'search'
+        return 'list'
+
+    def get_object(self):
+        post = post_cache.get(pk=self.kwargs['pk'])
+        if post is None:
+            post = archived_post_cache.get_or_404(pk=self.kwargs['pk'])
+            if self.request.method not in SAFE_METHODS:
+                raise PermissionDenied('Пост в архиве, его нельзя изменить.')
+        self.check_object_permissions(self.request, post)
+        return post
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @action(detail=False)
+    def batch(self, request):
+        posts, missing = get_posts(parse_ids(request.query_params.getlist(
+            'ids')))
+        serializer = self.get_serializer(posts, many=True)
+        return Response({'results': serializer.data, 'missing': missing})
+
 
 class GroupViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
 
+    def get_object(self):
+        return group_cache.get_or_404(pk=self.kwargs['pk'])
+
 
 class CommentViewSet(viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
 
     def perform_create(self, serializer):
-        post = get_object_or_404(Post,
-                                 pk=self.kwargs.get('post_id'))
+        post = post_cache.get_or_404(pk=self.kwargs.get('post_id'))
         serializer.save(author=self.request.user, post=post)
 
+    def get_throttle_scope(self, request):
+        return 'list' if self.action == 'list' else None
+
     def get_queryset(self):
-        post = get_object_or_404(Post,
-                                 pk=self.kwargs.get('post_id'))
-        return post.comments
+        return (Comment.objects
+                .filter(post_id=self.kwargs.get('post_id'))
+                .select_related('author')
+                .order_by('created', 'pk'))
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        post_id = self.kwargs.get('post_id')
+        if not response.data and post_cache.get(pk=post_id) is None:
+            post = archived_post_cache.get_or_404(pk=post_id)
+            comments = post.comments.select_related('author').order_by(
+                'created', 'pk')
+            response.data = self.get_serializer(comments, many=True).data
+        return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export(request):
+    kinds = request.query_params.getlist('type') or list(EXPORTS)
+    unknown = set(kinds) - set(EXPORTS)
+    if unknown:
+        raise ValidationError({'type': f'Неизвестные типы: {sorted(unknown)}'})
+    compress = request.query_params.get('gzip') in ('1', 'true')
+    response = StreamingHttpResponse(
+        encode_stream(export_lines(kinds), compress=compress),
+        content_type='application/gzip' if compress
+        else 'application/x-ndjson',
+    )
+    filename = 'export.ndjson.gz' if compress else 'export.ndjson'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@api_view(['GET'])
+def sync(request):
+    since = request.query_params.get('since')
+    if since is None:
+        return Response({'token': current_token()})
+    return Response(changes_since(parse_token(since)))
+
+
+@api_view(['GET'])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def events(request):
+    group_slug = request.query_params.get('group')
+    if group_slug:
+        group_id = group_cache.get_or_404(slug=group_slug).pk
+
+        def accept(payload):
+            return payload['group'] == group_id
+    elif request.query_params.get('following') in ('1', 'true'):
+        authors = set(Follow.objects.filter(user=request.user)
+                      .values_list('author__username', flat=True))
+
+        def accept(payload):
+            return payload['author'] in authors
+    else:
+        def accept(payload):
+            return True
+
+    response = StreamingHttpResponse(stream(initial_id(request), accept),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def bulk_follow_response(request, operation, key):
+    serializer = BulkFollowSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    done, missing = operation(request.user,
+                              serializer.validated_data['usernames'])
+    return Response({key: done, 'missing': missing})
+
+
+@api_view(['POST'])
+def follow(request):
+    return bulk_follow_response(request, bulk_follow, 'followed')
+
+
+@api_view(['POST'])
+def unfollow(request):
+    return bulk_follow_response(request, bulk_unfollow, 'unfollowed')
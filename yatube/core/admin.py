@@ -0,0 +1,64 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Profile, SlowQuery
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'source', 'sql', 'count', 'total_time',
+                    'average', 'p95', 'max_time', 'last_seen')
+    list_filter = ('view',)
+    search_fields = ('sql', 'source', 'fingerprint')
+    readonly_fields = ('fingerprint', 'sql', 'example', 'view', 'source',
+                       'count', 'total_time', 'max_time', 'p95', 'samples',
+                       'first_seen', 'last_seen')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('created', 'method', 'path', 'view', 'status',
+                    'duration', 'trigger', 'user')
+    list_filter = ('trigger', 'view')
+    search_fields = ('path',)
+    readonly_fields = ('created', 'method', 'path', 'view', 'status',
+                       'duration', 'trigger', 'user', 'download',
+                       'summary_block')
+    exclude = ('summary', 'stats')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<int:pk>/download/',
+                 self.admin_site.admin_view(self.download_view),
+                 name='core_profile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(Profile, pk=pk)
+        response = HttpResponse(bytes(profile.stats),
+                                content_type='application/octet-stream')
+        response['Content-Disposition'] = (
+            f'attachment; filename="profile-{pk}.prof"')
+        return response
+
+    def download(self, obj):
+        url = reverse('admin:core_profile_download', args=[obj.pk])
+        return format_html(
+            '<a href="{}">profile-{}.prof</a> — открывается pstats, '
+            'snakeviz или flameprof', url, obj.pk)
+    download.short_description = 'Файл pstats'
+
+    def summary_block(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+    summary_block.short_description = 'Сводка'
+
+
+admin.site.register(SlowQuery, SlowQueryAdmin)
+admin.site.register(Profile, ProfileAdmin)
@@ -0,0 +1,340 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.lru import LRUCache
+
+CLEAR_ALL = '*'
+
+
+class SQLiteStore:
+    """Общее для всех процессов хранилище кэша в отдельном файле SQLite.
+
+    Каждая запись добавляет строку в журнал changes; её номер служит
+    штампом версии, по которому процессы узнают, какие ключи сбросить
+    из своего локального уровня.
+    """
+
+    def __init__(self, path, busy_timeout=5, max_changes=10000,
+                 max_entries=100000):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.max_changes = max_changes
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path,
+                                         timeout=self.busy_timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS changes ('
+                'seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL)'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, callback):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = callback(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._writes += 1
+        if self._writes % 1000 == 0:
+            self.cull()
+        return result
+
+    def _log(self, connection, key):
+        connection.execute('INSERT INTO changes (key) VALUES (?)', (key,))
+
+    def _alive(self, connection, key, now):
+        row = connection.execute(
+            'SELECT value, expires FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        return row[0]
+
+    def get_many(self, keys, batch_size=500):
+        """Живые значения по ключам и номер последнего изменения.
+
+        Оба читаются из одного снимка базы: всё, что изменится после
+        чтения, придёт в журнале с большим номером.
+        """
+        keys = list(keys)
+        now = time.time()
+        found = {}
+        connection = self.connection
+        connection.execute('BEGIN')
+        try:
+            seq = self.last_seq()
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                found.update(connection.execute(
+                    'SELECT key, value FROM entries WHERE key IN ({}) '
+                    'AND (expires IS NULL OR expires > ?)'.format(
+                        ','.join('?' * len(batch))),
+                    batch + [now],
+                ).fetchall())
+        finally:
+            connection.execute('COMMIT')
+        return seq, found
+
+    def set(self, key, value, expires):
+        def callback(connection):
+            connection.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires) '
+                'VALUES (?, ?, ?)', (key, value, expires))
+            self._log(connection, key)
+        self._write(callback)
+
+    def add(self, key, value, expires):
+        def callback(connection):
+            if self._alive(connection, key, time.time()) is not None:
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires) '
+                'VALUES (?, ?, ?)', (key, value, expires))
+            self._log(connection, key)
+            return True
+        return self._write(callback)
+
+    def incr(self, key, delta):
+        def callback(connection):
+            value = self._alive(connection, key, time.time())
+            if value is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(value) + delta
+            connection.execute('UPDATE entries SET value = ? WHERE key = ?',
+                               (pickle.dumps(value), key))
+            self._log(connection, key)
+            return value
+        return self._write(callback)
+
+    def touch(self, key, expires):
+        def callback(connection):
+            if self._alive(connection, key, time.time()) is None:
+                return False
+            connection.execute('UPDATE entries SET expires = ? WHERE key = ?',
+                               (expires, key))
+            return True
+        return self._write(callback)
+
+    def delete(self, key):
+        def callback(connection):
+            deleted = connection.execute('DELETE FROM entries WHERE key = ?',
+                                         (key,)).rowcount
+            self._log(connection, key)
+            return bool(deleted)
+        return self._write(callback)
+
+    def clear(self):
+        def callback(connection):
+            connection.execute('DELETE FROM entries')
+            self._log(connection, CLEAR_ALL)
+        self._write(callback)
+
+    def last_seq(self):
+        return self.connection.execute(
+            'SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, seq):
+        rows = self.connection.execute(
+            'SELECT seq, key FROM changes WHERE seq > ? ORDER BY seq', (seq,)
+        ).fetchall()
+        if not rows:
+            return seq, []
+        keys = [key for _, key in rows]
+        if rows[0][0] != seq + 1:
+            # журнал обрезан раньше, чем процесс его дочитал
+            keys.append(CLEAR_ALL)
+        return rows[-1][0], keys
+
+    def cull(self):
+        """Удаляет просроченные записи, а сверх max_entries — самые старые.
+
+        Возраст — порядок rowid: INSERT OR REPLACE выдаёт строке новый.
+        Из журнала ничего не пишется: значение не менялось, и копии в
+        локальных уровнях остаются верными.
+        """
+        connection = self.connection
+        connection.execute('DELETE FROM entries WHERE expires <= ?',
+                           (time.time(),))
+        connection.execute(
+            'DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries '
+            'ORDER BY rowid LIMIT MAX(0, (SELECT COUNT(*) FROM entries) - ?))',
+            (self.max_entries,))
+        connection.execute('DELETE FROM changes WHERE seq <= ?',
+                           (self.last_seq() - self.max_changes,))
+
+
+class Tier:
+    """Локальный уровень процесса и его позиция в журнале изменений."""
+
+    def __init__(self, location, options):
+        self.store = SQLiteStore(
+            location, max_changes=options.get('MAX_CHANGES', 10000),
+            max_entries=options.get('MAX_ENTRIES', 100000))
+        self.local = LRUCache(maxsize=options.get('LOCAL_MAX_ENTRIES', 1000),
+                              ttl=options.get('LOCAL_TTL', 60))
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        self.seq = None
+        self.synced = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def sync(self):
+        now = time.monotonic()
+        if self.seq is not None and now - self.synced < self.sync_interval:
+            return
+        with self.lock:
+            if self.seq is None:
+                self.seq = self.store.last_seq()
+            else:
+                self.seq, keys = self.store.changes_since(self.seq)
+                if CLEAR_ALL in keys:
+                    self.local.clear()
+                else:
+                    for key in keys:
+                        self.local.delete(key)
+            self.synced = now
+
+    def remember(self, seq, values):
+        """Кладёт прочитанное в seq в LRU, если сбросы после seq не прошли.
+
+        Иначе sync мог уже удалить ключ, пока значение читалось, и старая
+        копия пережила бы сброс до истечения LOCAL_TTL.
+        """
+        with self.lock:
+            if self.seq is None or self.seq > seq:
+                return
+            for key, value in values.items():
+                self.local.set(key, value)
+
+
+# Django создаёт экземпляр бэкенда на каждый поток, а локальный уровень
+# должен быть общим для процесса — как _caches у LocMemCache.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """Бэкенд кэша: LRU процесса перед общим хранилищем SQLite.
+
+    Чтения сначала идут в локальный LRU, промахи — в общий файл. Записи
+    сразу уходят в общий файл и сбрасывают ключ локально; остальные
+    процессы узнают о них по журналу изменений не позже чем через
+    SYNC_INTERVAL секунд. Атомарные операции (add, incr) всегда
+    выполняются в общем хранилище.
+
+    OPTIONS: LOCAL_MAX_ENTRIES, LOCAL_TTL, SYNC_INTERVAL, MAX_CHANGES,
+    MAX_ENTRIES (записей в общем файле).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        with _tiers_lock:
+            if location not in _tiers:
+                _tiers[location] = Tier(location, params.get('OPTIONS', {}))
+            self._tier = _tiers[location]
+        self._store = self._tier.store
+        self._local = self._tier.local
+
+    def _local_ttl(self, expires):
+        if expires is None:
+            return self._local.ttl
+        return max(0, min(self._local.ttl, expires - time.time()))
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        self._tier.sync()
+        made = {self._key(key, version): key for key in keys}
+        found = {}
+        misses = []
+        for made_key in made:
+            value = self._local.get(made_key)
+            if value is None:
+                misses.append(made_key)
+            else:
+                found[made_key] = value
+        if misses:
+            seq, values = self._store.get_many(misses)
+            self._tier.remember(seq, values)
+            found.update(values)
+        self._tier.hits += len(found)
+        self._tier.misses += len(made) - len(found)
+        return {made[made_key]: pickle.loads(value)
+                for made_key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self._store.set(key, data, expires)
+        self._local.set(key, data, self._local_ttl(expires))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        added = self._store.add(key, data, expires)
+        if added:
+            self._local.set(key, data, self._local_ttl(expires))
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        value = self._store.incr(key, delta)
+        self._local.delete(key)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._local.delete(key)
+        return self._store.touch(key, self.get_backend_timeout(timeout))
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._local.delete(key)
+        return self._store.delete(key)
+
+    def has_key(self, key, version=None):
+        sentinel = object()
+        return self.get(key, sentinel, version=version) is not sentinel
+
+    def clear(self):
+        self._local.clear()
+        self._store.clear()
+
+    def stats(self):
+        return {'hits': self._tier.hits, 'misses': self._tier.misses}
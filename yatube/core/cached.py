@@ -0,0 +1,69 @@
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 10
+WAIT_STEP = 0.05
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def refresh(key, compute, timeout, stale):
+    started = time.time()
+    value = compute()
+    delta = time.time() - started
+    cache.set(key, (value, time.time() + timeout, delta), timeout + stale)
+    return value
+
+
+def get_or_compute(key, compute, timeout, stale=None, beta=1.0):
+    """Возвращает значение из кэша, пересчитывая его не более одним процессом.
+
+    Значение считается свежим timeout секунд и ещё stale секунд отдаётся
+    устаревшим, пока его пересчитывает тот, кто взял блокировку. Чтобы
+    пересчёт не совпадал у всех в момент истечения, он запускается
+    немного раньше с вероятностью, растущей к концу срока (XFetch):
+    чем дольше считалось значение, тем раньше начинается пересчёт.
+    """
+    stale = timeout if stale is None else stale
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        early = -delta * beta * math.log(random.random() or 1e-12)
+        if time.time() + early < expires:
+            return value
+        if not cache.add(lock_key(key), 1, LOCK_TIMEOUT):
+            return value
+        try:
+            return refresh(key, compute, timeout, stale)
+        finally:
+            cache.delete(lock_key(key))
+
+    if cache.add(lock_key(key), 1, LOCK_TIMEOUT):
+        try:
+            return refresh(key, compute, timeout, stale)
+        finally:
+            cache.delete(lock_key(key))
+    deadline = time.time() + LOCK_TIMEOUT
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return refresh(key, compute, timeout, stale)
+
+
+def invalidate(*keys):
+    cache.delete_many(keys)
+
+
+def prime(values, timeout, stale=None):
+    """Кладёт заранее посчитанные значения в формате get_or_compute."""
+    stale = timeout if stale is None else stale
+    expires = time.time() + timeout
+    cache.set_many({key: (value, expires, 0)
+                    for key, value in values.items()}, timeout + stale)
@@ -0,0 +1,232 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.objects import registry as object_caches
+
+METRICS_DIR = getattr(settings, 'METRICS_DIR',
+                      os.path.join(settings.BASE_DIR, 'cache', 'metrics'))
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+METRICS = {
+    'yatube_requests_total':
+        ('counter', 'Число запросов'),
+    'yatube_request_duration_seconds':
+        ('histogram', 'Время обработки запроса'),
+    'yatube_db_queries_total':
+        ('counter', 'Число запросов к базе'),
+    'yatube_db_query_seconds_total':
+        ('counter', 'Суммарное время запросов к базе'),
+    'yatube_cache_hits_total':
+        ('counter', 'Попадания в кэш'),
+    'yatube_cache_misses_total':
+        ('counter', 'Промахи кэша'),
+    'yatube_response_bytes_total':
+        ('counter', 'Суммарный размер ответов'),
+}
+
+
+def labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Агрегаты метрик процесса.
+
+    Каждый процесс раз в FLUSH_INTERVAL секунд пишет свой снимок в
+    METRICS_DIR/<pid>.json; /metrics складывает снимки всех процессов,
+    подставляя вместо файла текущего процесса его свежие значения.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.flushed = 0
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels_key(labels))
+        with self.lock:
+            histogram = self.histograms.setdefault(
+                key, [0] * (len(BUCKETS) + 2))
+            # счётчики по корзинам, затем сумма и общее число
+            for index, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value
+                             in self.counters.items()],
+                'histograms': [[name, labels, list(values)]
+                               for (name, labels), values
+                               in self.histograms.items()],
+            }
+
+    def path(self):
+        return os.path.join(METRICS_DIR, f'{os.getpid()}.json')
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.flushed < FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=METRICS_DIR,
+                                                 suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(temporary, self.path())
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+
+registry = Registry()
+
+
+def cache_stats():
+    stats = {}
+    for alias in settings.CACHES:
+        if hasattr(caches[alias], 'stats'):
+            stats[alias] = caches[alias].stats()
+    for object_cache in object_caches:
+        stats[f'object:{object_cache.name}'] = object_cache.stats()
+    return stats
+
+
+def record(view, method, status, duration, queries, query_time,
+           cache_delta, size):
+    labels = {'view': view}
+    registry.inc('yatube_requests_total',
+                 dict(labels, method=method, status=str(status)))
+    registry.observe('yatube_request_duration_seconds', labels, duration)
+    registry.inc('yatube_db_queries_total', labels, queries)
+    registry.inc('yatube_db_query_seconds_total', labels, query_time)
+    for name, (hits, misses) in cache_delta.items():
+        if hits:
+            registry.inc('yatube_cache_hits_total',
+                         dict(labels, cache=name), hits)
+        if misses:
+            registry.inc('yatube_cache_misses_total',
+                         dict(labels, cache=name), misses)
+    if size is not None:
+        registry.inc('yatube_response_bytes_total', labels, size)
+    registry.flush()
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def load_snapshots():
+    """Снимки всех процессов; файлы завершившихся процессов удаляются."""
+    snapshots = [registry.snapshot()]
+    own = os.path.basename(registry.path())
+    try:
+        names = os.listdir(METRICS_DIR)
+    except FileNotFoundError:
+        return snapshots
+    for name in names:
+        if not name.endswith('.json') or name == own:
+            continue
+        path = os.path.join(METRICS_DIR, name)
+        pid = name[:-len('.json')]
+        if pid.isdigit() and not alive(int(pid)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            total = histograms.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+    return counters, histograms
+
+
+def escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"'
+                          for name, value in labels) + '}'
+
+
+def format_number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus."""
+    counters, histograms = merge(load_snapshots())
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f'{name}{format_labels(labels)} '
+                             f'{format_number(value)}')
+        for (name, labels), values in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, values):
+                cumulative += count
+                bucket_labels = labels + (('le', str(bound)),)
+                lines.append(f'{name}_bucket{format_labels(bucket_labels)} '
+                             f'{cumulative}')
+            bucket_labels = labels + (('le', '+Inf'),)
+            lines.append(f'{name}_bucket{format_labels(bucket_labels)} '
+                         f'{format_number(values[-1])}')
+            lines.append(f'{name}_sum{format_labels(labels)} '
+                         f'{format_number(values[-2])}')
+            lines.append(f'{name}_count{format_labels(labels)} '
+                         f'{format_number(values[-1])}')
+    return '\n'.join(lines) + '\n'
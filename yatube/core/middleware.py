@@ -0,0 +1,113 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.db import DatabaseError, connections
+
+from core import metrics, profiling, slow_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Обёртка execute_wrapper: считает запросы к базе и их время."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.monotonic() - started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """Время ответа, запросы к базе, кэш и размер ответа по каждой view.
+
+    Счётчики кэша общие для процесса, поэтому при нескольких потоках
+    попадания могут приписываться соседнему запросу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        cache_before = metrics.cache_stats()
+        started = time.monotonic()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.monotonic() - started
+        cache_delta = {}
+        for name, stats in metrics.cache_stats().items():
+            before = cache_before.get(name, {'hits': 0, 'misses': 0})
+            cache_delta[name] = (stats['hits'] - before['hits'],
+                                 stats['misses'] - before['misses'])
+        size = None if response.streaming else len(response.content)
+        metrics.record(view_name(request), request.method,
+                       response.status_code, duration, queries.count,
+                       queries.duration, cache_delta, size)
+        return response
+
+
+class SlowQueryMiddleware:
+    """Пишет медленные запросы в SlowQuery с view и местом вызова.
+
+    Стоит первым, чтобы собственные записи в базу не попадали ни в
+    журнал, ни в метрики view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = slow_queries.SlowQueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        if recorder.queries:
+            try:
+                slow_queries.save(recorder.queries, view_name(request))
+            except DatabaseError:
+                # журнал не должен ронять ответ, особенно когда база и так
+                # занята
+                logger.warning('Не удалось записать медленные запросы',
+                               exc_info=True)
+        return response
+
+
+class ProfileMiddleware:
+    """Профилирует view и отрисовку шаблонов по флагу или по выборке.
+
+    Должна стоять после AuthenticationMiddleware. Без флага и с нулевой
+    PROFILE_SAMPLE_RATE стоит одной проверки заголовка на запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = profiling.trigger(request)
+        if reason is None:
+            return self.get_response(request)
+        response, profiler, duration = profiling.run(self.get_response,
+                                                     request)
+        if profiler is not None:
+            profile = profiling.save(request, response, profiler, duration,
+                                     reason, view_name(request))
+            response['X-Profile-Id'] = str(profile.pk)
+        return response
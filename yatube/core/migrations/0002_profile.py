@@ -0,0 +1,37 @@
+# Generated by Django 2.2 on 2026-10-19 13:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0001_slow_query'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, verbose_name='Путь')),
+                ('method', models.CharField(max_length=10, verbose_name='Метод')),
+                ('view', models.CharField(max_length=200, verbose_name='View')),
+                ('status', models.PositiveSmallIntegerField(verbose_name='Статус')),
+                ('trigger', models.CharField(choices=[('flag', 'По запросу'), ('sample', 'Выборка')], max_length=10, verbose_name='Причина')),
+                ('duration', models.FloatField(verbose_name='Длительность, с')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('summary', models.TextField(verbose_name='Сводка')),
+                ('stats', models.BinaryField(verbose_name='Данные pstats')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Профиль запроса',
+                'verbose_name_plural': 'Профили запросов',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+import json
+import math
+
+from django.conf import settings
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    fingerprint = models.CharField('Отпечаток', max_length=32, db_index=True)
+    sql = models.TextField('Нормализованный SQL')
+    example = models.TextField('Пример запроса')
+    view = models.CharField('View', max_length=200)
+    source = models.CharField('Источник', max_length=300,
+                              help_text='Шаблон и строка или кадр Python')
+    count = models.PositiveIntegerField('Количество', default=0)
+    total_time = models.FloatField('Суммарное время, с', default=0)
+    max_time = models.FloatField('Максимум, с', default=0)
+    samples = models.TextField('Последние длительности', default='[]')
+    first_seen = models.DateTimeField('Впервые', auto_now_add=True)
+    last_seen = models.DateTimeField('Последний раз', auto_now=True)
+
+    class Meta:
+        ordering = ['-total_time']
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint', 'view', 'source'],
+                name='unique-slow-query'),
+        ]
+
+    def __str__(self):
+        return f'{self.view}: {self.sql[:50]}'
+
+    def durations(self):
+        return json.loads(self.samples)
+
+    def p95(self):
+        durations = sorted(self.durations())
+        if not durations:
+            return None
+        return durations[math.ceil(0.95 * len(durations)) - 1]
+    p95.short_description = 'p95, с'
+
+    def average(self):
+        return self.total_time / self.count if self.count else None
+    average.short_description = 'Среднее, с'
+
+
+class Profile(models.Model):
+    FLAG = 'flag'
+    SAMPLE = 'sample'
+    TRIGGERS = (
+        (FLAG, 'По запросу'),
+        (SAMPLE, 'Выборка'),
+    )
+
+    path = models.CharField('Путь', max_length=500)
+    method = models.CharField('Метод', max_length=10)
+    view = models.CharField('View', max_length=200)
+    status = models.PositiveSmallIntegerField('Статус')
+    trigger = models.CharField('Причина', max_length=10, choices=TRIGGERS)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.SET_NULL,
+                             null=True,
+                             blank=True,
+                             related_name='+',
+                             verbose_name='Пользователь')
+    duration = models.FloatField('Длительность, с')
+    created = models.DateTimeField('Дата', auto_now_add=True)
+    summary = models.TextField('Сводка')
+    stats = models.BinaryField('Данные pstats')
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
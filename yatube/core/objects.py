@@ -0,0 +1,147 @@
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+registry = []
+
+
+class ObjectCache:
+    """Сквозной кэш объектов модели по pk и уникальным полям.
+
+    Объект хранится один раз под ключом pk, уникальные поля из lookups
+    ведут к этому pk; при чтении по такому полю значение перепроверяется,
+    чтобы после переименования старое имя не вело к чужому объекту.
+    Связанные объекты из related не кладутся в кэш вместе с объектом, а
+    подставляются из своих кэшей — так изменение автора не оставляет
+    устаревших копий в закэшированных постах. Сбрасывать записи при
+    сохранении и удалении должны обработчики сигналов через forget().
+    """
+
+    def __init__(self, model, name, lookups=(), fields=None, related=None,
+                 ttl=600):
+        self.model = model
+        self.name = name
+        self.lookups = tuple(lookups)
+        self.fields = fields
+        self.related = related or {}
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        registry.append(self)
+
+    def pk_key(self, pk):
+        return f'objects:{self.name}:pk:{pk}'
+
+    def lookup_key(self, field, value):
+        return f'objects:{self.name}:{field}:{quote(str(value))}'
+
+    def queryset(self):
+        queryset = self.model._default_manager.all()
+        if self.fields:
+            queryset = queryset.only(*self.fields)
+        return queryset
+
+    def remember(self, obj):
+        entries = {self.pk_key(obj.pk): obj}
+        for field in self.lookups:
+            entries[self.lookup_key(field, getattr(obj, field))] = obj.pk
+        cache.set_many(entries, self.ttl)
+
+    def forget(self, obj):
+        self.forget_many([obj])
+
+    def forget_many(self, objects):
+        keys = []
+        for obj in objects:
+            keys.append(self.pk_key(obj.pk))
+            keys.extend(self.lookup_key(field, getattr(obj, field))
+                        for field in self.lookups)
+        cache.delete_many(keys)
+
+    def attach(self, objects):
+        """Подставляет связанные объекты из их кэшей, по get_many на связь."""
+        for name, related_cache in self.related.items():
+            attname = self.model._meta.get_field(name).attname
+            found = related_cache.get_many(
+                {getattr(obj, attname) for obj in objects} - {None})
+            for obj in objects:
+                value = getattr(obj, attname)
+                if value is None or value in found:
+                    setattr(obj, name, found.get(value))
+
+    def get_many(self, pks):
+        """Словарь pk -> объект; промахи достаются одним запросом."""
+        pks = set(pks)
+        cached = cache.get_many([self.pk_key(pk) for pk in pks])
+        objects = {obj.pk: obj for obj in cached.values()}
+        misses = pks - set(objects)
+        self.hits += len(objects)
+        self.misses += len(misses)
+        if misses:
+            for obj in self.queryset().filter(pk__in=misses):
+                self.remember(obj)
+                objects[obj.pk] = obj
+        self.attach(list(objects.values()))
+        return objects
+
+    def get(self, **lookup):
+        (field, value), = lookup.items()
+        if field == 'pk':
+            try:
+                pk = self.model._meta.pk.to_python(value)
+            except ValidationError:
+                return None
+            return self.get_many([pk]).get(pk)
+        if field not in self.lookups:
+            raise ValueError(f'{self.name}: поиск по {field} не кэшируется')
+        pk = cache.get(self.lookup_key(field, value))
+        if pk is not None:
+            obj = self.get_many([pk]).get(pk)
+            if obj is not None and getattr(obj, field) == value:
+                return obj
+            cache.delete(self.lookup_key(field, value))
+        self.misses += 1
+        obj = self.queryset().filter(**lookup).first()
+        if obj is not None:
+            self.remember(obj)
+            self.attach([obj])
+        return obj
+
+    def get_or_404(self, **lookup):
+        obj = self.get(**lookup)
+        if obj is None:
+            raise Http404('Объект не найден')
+        return obj
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class Attached:
+    """Ленивая выборка, которая при первом чтении вызывает attach().
+
+    Пока её не читают — например, фрагмент шаблона взят из кэша, —
+    запросов к базе нет вовсе.
+    """
+
+    def __init__(self, object_cache, queryset):
+        self.object_cache = object_cache
+        self.queryset = queryset
+        self._objects = None
+
+    def _load(self):
+        if self._objects is None:
+            self._objects = list(self.queryset)
+            self.object_cache.attach(self._objects)
+        return self._objects
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __getitem__(self, index):
+        return self._load()[index]
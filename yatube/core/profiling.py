@@ -0,0 +1,78 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import time
+
+from django.conf import settings
+
+SAMPLE_RATE = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+KEEP = getattr(settings, 'PROFILE_KEEP', 500)
+HEADER = 'HTTP_X_PROFILE'
+QUERY_FLAG = 'profile'
+SUMMARY_LINES = 40
+
+
+def trigger(request):
+    """Причина профилировать запрос или None.
+
+    Сотрудник включает профиль заголовком X-Profile: 1 или параметром
+    ?profile=1, остальные запросы попадают в выборку с вероятностью
+    PROFILE_SAMPLE_RATE.
+    """
+    from core.models import Profile
+
+    if ((request.META.get(HEADER) == '1'
+         or request.GET.get(QUERY_FLAG) == '1')
+            and request.user.is_staff):
+        return Profile.FLAG
+    if SAMPLE_RATE and random.random() < SAMPLE_RATE:
+        return Profile.SAMPLE
+    return None
+
+
+def run(get_response, request):
+    """Выполняет запрос под cProfile; возвращает ответ, профиль и время."""
+    profiler = cProfile.Profile()
+    started = time.monotonic()
+    try:
+        profiler.enable()
+    except ValueError:
+        # уже работает другой профилировщик
+        return get_response(request), None, 0
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    return response, profiler, time.monotonic() - started
+
+
+def summarize(profiler):
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats(
+        'cumulative').print_stats(SUMMARY_LINES)
+    return output.getvalue()
+
+
+def save(request, response, profiler, duration, reason, view):
+    from core.models import Profile
+
+    profiler.create_stats()
+    # pstats.Stats забирает stats у профилировщика — сохраняем их раньше
+    data = marshal.dumps(profiler.stats)
+    profile = Profile.objects.create(
+        path=request.get_full_path()[:500],
+        method=request.method,
+        view=view,
+        status=response.status_code,
+        trigger=reason,
+        user=request.user if request.user.is_authenticated else None,
+        duration=duration,
+        summary=summarize(profiler),
+        stats=data,
+    )
+    stale = Profile.objects.values_list('pk', flat=True)[KEEP:KEEP + 100]
+    if stale:
+        Profile.objects.filter(pk__in=list(stale)).delete()
+    return profile
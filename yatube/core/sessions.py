@@ -0,0 +1,181 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import caches
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'core.sessions'
+WRITE_BEHIND = getattr(settings, 'SESSION_WRITE_BEHIND', 300)
+CLEANUP_BATCH = getattr(settings, 'SESSION_CLEANUP_BATCH', 500)
+PERSISTENT_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+# session_key -> (данные, время отложенного сохранения): изменения,
+# которые этот процесс пока записал только в кэш
+_dirty = {}
+_dirty_lock = threading.Lock()
+_flushed = {'at': time.time()}
+
+
+class SessionStore(DBStore):
+    """Сессии в кэше с отложенной записью в базу.
+
+    Чтение идёт из кэша, в базу — только при промахе. Запись в базу
+    выполняется сразу при создании сессии и при смене пользователя, в
+    остальных случаях — не чаще раза в SESSION_WRITE_BEHIND секунд; между
+    записями актуальная версия живёт в кэше. Сохранение без фактических
+    изменений данных пропускается целиком. Отложенные изменения процесс
+    помнит сам и дописывает в базу через flush_dirty(): раз в
+    SESSION_WRITE_BEHIND секунд и при завершении, так что их не теряет ни
+    вытеснение из кэша, ни его очистка.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        self._db_saved = None
+        self._loaded_state = None
+        self._loaded_auth = None
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _state(self, data):
+        return self.serializer().dumps(data)
+
+    def _auth(self, data):
+        return tuple(data.get(key) for key in PERSISTENT_KEYS)
+
+    def _remember(self, data):
+        self._loaded_state = self._state(data)
+        self._loaded_auth = self._auth(data)
+
+    def load(self):
+        try:
+            entry = self._cache.get(self.cache_key)
+        except Exception:
+            entry = None
+
+        if entry is None:
+            s = self._get_session_from_db()
+            if s:
+                entry = {'data': self.decode(s.session_data),
+                         'db_saved': time.time()}
+                self._cache.set(self.cache_key, entry,
+                                self.get_expiry_age(expiry=s.expire_date))
+            else:
+                entry = {'data': {}, 'db_saved': None}
+        self._db_saved = entry['db_saved']
+        self._remember(entry['data'])
+        return entry['data']
+
+    def exists(self, session_key):
+        return (session_key
+                and (self.cache_key_prefix + session_key) in self._cache
+                or super().exists(session_key))
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and self._loaded_state == self._state(data):
+            return
+        now = time.time()
+        if (must_create or self._db_saved is None
+                or now - self._db_saved >= WRITE_BEHIND
+                or self._loaded_auth != self._auth(data)):
+            super().save(must_create)
+            self._db_saved = now
+            with _dirty_lock:
+                _dirty.pop(self.session_key, None)
+        else:
+            with _dirty_lock:
+                _dirty[self.session_key] = (dict(data), now)
+        self._cache.set(self.cache_key,
+                        {'data': data, 'db_saved': self._db_saved},
+                        self.get_expiry_age())
+        self._remember(data)
+        flush_dirty()
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        with _dirty_lock:
+            _dirty.pop(session_key, None)
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+    def flush(self):
+        self.clear()
+        self.delete(self.session_key)
+        self._session_key = None
+
+    @classmethod
+    def clear_expired(cls):
+        """Удаляет истёкшие сессии пачками, не блокируя базу надолго."""
+        model = cls.get_model_class()
+        now = timezone.now()
+        while True:
+            keys = list(model.objects.filter(expire_date__lt=now)
+                        .values_list('session_key', flat=True)
+                        [:CLEANUP_BATCH])
+            if not keys:
+                break
+            model.objects.filter(session_key__in=keys).delete()
+
+
+def flush_dirty(force=False):
+    """Пишет в базу сессии, изменения которых пока есть только в кэше.
+
+    Берётся свежая версия из кэша (её мог обновить другой процесс), а
+    если её вытеснили — копия, запомненная при сохранении. Возвращает
+    число записанных сессий.
+    """
+    now = time.time()
+    with _dirty_lock:
+        if not _dirty or not force and now - _flushed['at'] < WRITE_BEHIND:
+            return 0
+        _flushed['at'] = now
+        pending = dict(_dirty)
+        _dirty.clear()
+    written = 0
+    for session_key, (data, deferred) in pending.items():
+        store = SessionStore(session_key)
+        entry = store._cache.get(store.cache_key)
+        if entry is not None:
+            if entry['db_saved'] is not None and entry['db_saved'] >= deferred:
+                continue
+            data = entry['data']
+        store._session_cache = data
+        try:
+            DBStore.save(store)
+        except UpdateError:
+            # сессию за это время удалили из базы
+            continue
+        store._cache.set(store.cache_key, {'data': data, 'db_saved': now},
+                         store.get_expiry_age())
+        written += 1
+    return written
+
+
+def flush_at_exit():
+    try:
+        flush_dirty(force=True)
+    except Exception:
+        logger.exception('Не удалось сохранить отложенные сессии')
+
+
+atexit.register(flush_at_exit)
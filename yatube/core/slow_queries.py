@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+THRESHOLD = getattr(settings, 'SLOW_QUERY_THRESHOLD', 0.1)
+SAMPLES = getattr(settings, 'SLOW_QUERY_SAMPLES', 100)
+EXAMPLE_LENGTH = 5000
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+
+PACKAGE_DIRS = tuple(path for path in sys.path
+                     if path.endswith(('site-packages', 'dist-packages')))
+SKIP_FILES = (__file__,)
+
+
+def normalize(sql):
+    """SQL без значений: литералы и %s — в ?, списки IN — в (...)."""
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql.replace('%s', '?'))
+    sql = LISTS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(sql.encode()).hexdigest()
+
+
+def find_source(frame):
+    """Узел шаблона или ближайший кадр кода проекта, выполнивший запрос.
+
+    Шаблон ищется по кадрам Node.render_annotated: у узла есть origin и
+    token с номером строки. Если запрос пришёл не из шаблона, берётся
+    самый глубокий кадр из файлов проекта.
+    """
+    project_frame = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        if (project_frame is None
+                and code.co_filename.startswith(settings.BASE_DIR)
+                and not code.co_filename.startswith(PACKAGE_DIRS)
+                and code.co_filename not in SKIP_FILES):
+            project_frame = frame
+        frame = frame.f_back
+    if project_frame is None:
+        return '<unknown>'
+    path = os.path.relpath(project_frame.f_code.co_filename,
+                           settings.BASE_DIR)
+    return (f'{path}:{project_frame.f_lineno} '
+            f'in {project_frame.f_code.co_name}')
+
+
+class SlowQueryRecorder:
+    """Обёртка execute_wrapper, запоминающая запросы дольше THRESHOLD."""
+
+    def __init__(self, threshold=None):
+        self.threshold = THRESHOLD if threshold is None else threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.monotonic() - started
+            if duration >= self.threshold:
+                example = f'{sql}\n-- {params!r}'[:EXAMPLE_LENGTH]
+                self.queries.append((sql, example, duration,
+                                     find_source(sys._getframe(1))))
+
+
+def save(queries, view):
+    """Добавляет запросы в агрегаты SlowQuery по отпечатку, view и месту."""
+    from core.models import SlowQuery
+
+    with transaction.atomic():
+        for sql, example, duration, source in queries:
+            normalized = normalize(sql)
+            entry, _ = SlowQuery.objects.select_for_update().get_or_create(
+                fingerprint=fingerprint(normalized), view=view,
+                source=source[:300],
+                defaults={'sql': normalized, 'example': example},
+            )
+            entry.count += 1
+            entry.total_time += duration
+            entry.max_time = max(entry.max_time, duration)
+            entry.samples = json.dumps(
+                (entry.durations() + [duration])[-SAMPLES:])
+            entry.save()
@@ -0,0 +1,49 @@
+import hashlib
+import random
+
+from django.core.cache import cache
+
+from core.cached import get_or_compute
+
+
+def version_key(tag):
+    return f'tag:{tag}'
+
+
+def versions(tags):
+    """Текущие версии тегов; отсутствующие заводятся заново.
+
+    Начальная версия случайна, поэтому вытесненный и заведённый повторно
+    тег не вернётся к старому номеру и не оживит записи, сохранённые до
+    вытеснения.
+    """
+    keys = [version_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            initial = random.getrandbits(48)
+            cache.add(key, initial, None)
+            found[key] = cache.get(key, initial)
+    return [found[key] for key in keys]
+
+
+def tagged_key(key, tags):
+    tags = sorted(set(tags))
+    signature = ','.join(f'{tag}={version}' for tag, version
+                         in zip(tags, versions(tags)))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'{key}:{digest}'
+
+
+def bump(*tags):
+    """Делает устаревшими все записи, помеченные любым из тегов."""
+    for tag in set(tags):
+        try:
+            cache.incr(version_key(tag))
+        except ValueError:
+            # версии нет — при следующем чтении заведётся новая
+            pass
+
+
+def cached(key, tags, compute, timeout):
+    return get_or_compute(tagged_key(key, tags), compute, timeout)
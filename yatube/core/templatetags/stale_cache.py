@@ -0,0 +1,81 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core.cached import get_or_compute
+from core.tags import tagged_key
+
+register = template.Library()
+
+
+class StaleCacheNode(template.Node):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on,
+                 tags_var=None):
+        self.nodelist = nodelist
+        self.expire_time_var = expire_time_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.tags_var = tags_var
+
+    def render(self, context):
+        try:
+            expire_time = int(self.expire_time_var.resolve(context))
+        except (template.VariableDoesNotExist, TypeError, ValueError):
+            raise template.TemplateSyntaxError(
+                f'"swrcache" tag got a non-integer timeout value: '
+                f'{self.expire_time_var.var!r}'
+            )
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = make_template_fragment_key(self.fragment_name, vary_on)
+        if self.tags_var is not None:
+            key = tagged_key(key, self.tags_var.resolve(context) or [])
+        return get_or_compute(key, lambda: self.nodelist.render(context),
+                              expire_time)
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """Как {% cache %}, но с защитой от одновременного пересчёта.
+
+        {% load stale_cache %}
+        {% swrcache 20 index_page page_obj.number %}...{% endswrcache %}
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 2 arguments."
+        )
+    return StaleCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
+
+
+@register.tag('tagcache')
+def do_tagcache(parser, token):
+    """Как {% swrcache %}, но ключ зависит ещё и от версий тегов.
+
+    Третий аргумент — список тегов из контекста; фрагмент устаревает,
+    как только поднимается версия любого из них.
+
+        {% tagcache 600 group_page cache_tags page_obj.number %}
+        ...
+        {% endtagcache %}
+    """
+    nodelist = parser.parse(('endtagcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 4:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires at least 3 arguments."
+        )
+    return StaleCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[4:]],
+        tags_var=parser.compile_filter(tokens[3]),
+    )
@@ -0,0 +1,80 @@
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteStore, Tier, TwoTierCache
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = TwoTierCache(self.location, {
+            'OPTIONS': {'SYNC_INTERVAL': 0},
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('new', 'value'))
+        self.assertEqual(self.cache.get_many(['key', 'new', 'missing']),
+                         {'key': {'value': 1}, 'new': 'value'})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', 'default'), 'default')
+
+    def test_incr_and_expiry(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(self.cache.get('counter'), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('short', 'value', 0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 'again'))
+
+    def test_returned_values_are_copies(self):
+        self.cache.set('list', [1])
+        self.cache.get('list').append(2)
+        self.assertEqual(self.cache.get('list'), [1])
+
+    def test_other_process_write_invalidates_local_tier(self):
+        self.cache.set('key', 'old')
+        self.assertEqual(self.cache.get('key'), 'old')
+        other = Tier(self.location, {})
+        key = self.cache.make_key('key')
+        other.store.set(key, pickle.dumps('new'), None)
+        self.assertEqual(self.cache.get('key'), 'new')
+        other.store.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_value_read_before_invalidation_not_kept(self):
+        self.cache.set('key', 'old')
+        key = self.cache.make_key('key')
+        tier = self.cache._tier
+        tier.local.clear()
+        # значение прочитано, и тут же другой процесс его меняет
+        seq, values = tier.store.get_many([key])
+        Tier(self.location, {}).store.set(key, pickle.dumps('new'), None)
+        tier.sync()
+        tier.remember(seq, values)
+        self.assertIsNone(tier.local.get(key))
+        self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_cull_keeps_newest_entries(self):
+        store = SQLiteStore(self.location, max_entries=3)
+        for index in range(5):
+            store.set(f'key{index}', pickle.dumps(index), None)
+        store.set('key0', pickle.dumps('again'), None)
+        store.cull()
+        _, found = store.get_many([f'key{index}' for index in range(5)])
+        self.assertEqual(set(found), {'key3', 'key4', 'key0'})
@@ -0,0 +1,74 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core import cached
+
+
+class GetOrComputeTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_fresh_value_is_computed_once(self):
+        self.assertEqual(cached.get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(cached.get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_served_while_locked(self):
+        cache.set('key', (1, time.time() - 1, 0), 60)
+        cache.add(cached.lock_key('key'), 1, 10)
+        self.assertEqual(cached.get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_value_refreshed_by_lock_holder(self):
+        cache.set('key', (1, time.time() - 1, 0), 60)
+        self.calls = 1
+        self.assertEqual(cached.get_or_compute('key', self.compute, 60), 2)
+        self.assertIsNone(cache.get(cached.lock_key('key')))
+
+    def test_early_expiration(self):
+        cache.set('key', (1, time.time() + 1, 10), 60)
+        with mock.patch('core.cached.random.random', return_value=0.5):
+            self.assertEqual(
+                cached.get_or_compute('key', self.compute, 60), 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        cache.add(cached.lock_key('key'), 1, 10)
+
+        def sleep(seconds):
+            cache.set('key', ('ready', time.time() + 60, 0), 60)
+
+        with mock.patch('core.cached.time.sleep', side_effect=sleep):
+            self.assertEqual(
+                cached.get_or_compute('key', self.compute, 60), 'ready')
+        self.assertEqual(self.calls, 0)
+
+    def test_invalidate(self):
+        cached.get_or_compute('key', self.compute, 60)
+        cached.invalidate('key')
+        self.assertEqual(cached.get_or_compute('key', self.compute, 60), 2)
+
+
+class StaleCacheTagTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_fragment_is_cached(self):
+        template = Template('{% load stale_cache %}'
+                            '{% swrcache 60 fragment page %}{{ value }}'
+                            '{% endswrcache %}')
+        self.assertEqual(template.render(Context({'value': 1, 'page': 1})),
+                         '1')
+        self.assertEqual(template.render(Context({'value': 2, 'page': 1})),
+                         '1')
+        self.assertEqual(template.render(Context({'value': 2, 'page': 2})),
+                         '2')
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        for patcher in (
+                mock.patch('core.metrics.METRICS_DIR', self.directory),
+                mock.patch('core.views.METRICS_ALLOWED_IPS', ['127.0.0.1'])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        metrics.registry.reset()
+        self.client = Client()
+        user = User.objects.create_user(username='author')
+        Post.objects.create(author=user, text='Пост')
+
+    def sample(self, text, line_start):
+        for line in text.splitlines():
+            if line.startswith(line_start):
+                return float(line.rsplit(' ', 1)[1])
+        self.fail(f'{line_start} не найдено')
+
+    def test_records_views(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = self.client.get('/metrics').content.decode()
+        view = '{view="posts:index"}'
+        self.assertEqual(self.sample(
+            text, 'yatube_requests_total{method="GET",status="200",'
+                  'view="posts:index"}'), 2)
+        self.assertEqual(self.sample(
+            text, 'yatube_request_duration_seconds_count' + view), 2)
+        self.assertGreater(self.sample(
+            text, 'yatube_db_queries_total' + view), 0)
+        self.assertGreater(self.sample(
+            text, 'yatube_response_bytes_total' + view), 0)
+        self.assertIn('yatube_request_duration_seconds_bucket{'
+                      'view="posts:index",le="+Inf"} 2', text)
+        self.assertIn('yatube_cache_hits_total{cache="default",'
+                      'view="posts:index"}', text)
+
+    def test_merges_other_workers(self):
+        self.client.get(reverse('posts:index'))
+        other = {'counters': [['yatube_requests_total',
+                               [['method', 'GET'], ['status', '200'],
+                                ['view', 'posts:index']], 3]],
+                 'histograms': []}
+        with open(os.path.join(self.directory, f'{os.getppid()}.json'),
+                  'w') as file:
+            json.dump(other, file)
+        text = self.client.get('/metrics').content.decode()
+        self.assertEqual(self.sample(
+            text, 'yatube_requests_total{method="GET",status="200",'
+                  'view="posts:index"}'), 4)
+
+    def test_flush_writes_process_file(self):
+        self.client.get(reverse('posts:index'))
+        metrics.registry.flush(force=True)
+        with open(metrics.registry.path()) as file:
+            self.assertTrue(json.load(file)['counters'])
+
+    def test_dead_workers_pruned(self):
+        finished = subprocess.Popen([sys.executable, '-c', ''])
+        finished.wait()
+        path = os.path.join(self.directory, f'{finished.pid}.json')
+        with open(path, 'w') as file:
+            json.dump({'counters': [['yatube_requests_total', [], 5]],
+                       'histograms': []}, file)
+        text = self.client.get('/metrics').content.decode()
+        self.assertNotIn('yatube_requests_total 5', text)
+        self.assertFalse(os.path.exists(path))
+
+    def test_forbidden_for_other_hosts(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+
+    def test_closed_by_default(self):
+        with mock.patch('core.views.METRICS_ALLOWED_IPS', []):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 403)
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(staff)
+        with mock.patch('core.views.METRICS_ALLOWED_IPS', []):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,53 @@
+import marshal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.models import Profile
+
+User = get_user_model()
+
+
+class ProfileMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.user = User.objects.create_user(username='user')
+        self.client = Client()
+
+    def test_disabled_by_default(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:index'), {'profile': '1'})
+        self.client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+        self.assertFalse(Profile.objects.exists())
+
+    def test_staff_flag(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'),
+                                   HTTP_X_PROFILE='1')
+        profile = Profile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.view, 'posts:index')
+        self.assertEqual(profile.trigger, Profile.FLAG)
+        self.assertEqual(profile.user, self.staff)
+        self.assertIn('cumulative', profile.summary)
+        stats = marshal.loads(bytes(profile.stats))
+        self.assertTrue(any(name == 'index' for _, _, name in stats))
+
+    def test_sampling(self):
+        with mock.patch('core.profiling.SAMPLE_RATE', 1):
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(Profile.objects.get().trigger, Profile.SAMPLE)
+
+    def test_admin_download(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('posts:index'), {'profile': '1'})
+        pk = response['X-Profile-Id']
+        self.assertContains(
+            self.client.get(f'/admin/core/profile/{pk}/change/'),
+            f'profile-{pk}.prof')
+        download = self.client.get(f'/admin/core/profile/{pk}/download/')
+        self.assertEqual(marshal.loads(download.content),
+                         marshal.loads(bytes(Profile.objects.get().stats)))
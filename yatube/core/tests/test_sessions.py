@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core import sessions
+from core.sessions import SessionStore
+
+User = get_user_model()
+
+
+def session_queries(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'django_session' in query['sql']]
+
+
+class SessionStoreTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_authenticated_request_skips_session_queries(self):
+        User.objects.create_user(username='author', password='pass-12345')
+        client = Client()
+        self.assertTrue(client.login(username='author',
+                                     password='pass-12345'))
+        client.get('/')
+        with CaptureQueriesContext(connection) as context:
+            client.get('/')
+        self.assertEqual(session_queries(context), [])
+
+    def test_create_writes_database(self):
+        store = SessionStore()
+        store['key'] = 'value'
+        store.create()
+        self.assertTrue(Session.objects.filter(
+            session_key=store.session_key).exists())
+
+    def test_unchanged_save_skipped(self):
+        store = SessionStore()
+        store['key'] = 'value'
+        store.create()
+        store = SessionStore(store.session_key)
+        store['key'] = 'value'
+        with self.assertNumQueries(0):
+            store.save()
+
+    def test_change_written_behind(self):
+        store = SessionStore()
+        store['key'] = 'old'
+        store.create()
+        store = SessionStore(store.session_key)
+        store['key'] = 'new'
+        with self.assertNumQueries(0):
+            store.save()
+        self.assertEqual(SessionStore(store.session_key)['key'], 'new')
+        with mock.patch('core.sessions.WRITE_BEHIND', 0):
+            store = SessionStore(store.session_key)
+            store['key'] = 'newer'
+            store.save()
+        cache.clear()
+        self.assertEqual(SessionStore(store.session_key)['key'], 'newer')
+
+    def test_deferred_change_flushed(self):
+        store = SessionStore()
+        store['key'] = 'old'
+        store.create()
+        store = SessionStore(store.session_key)
+        store['key'] = 'new'
+        store.save()
+        # вытеснение из кэша не теряет изменение, записанное только туда
+        cache.clear()
+        self.assertEqual(sessions.flush_dirty(), 0)
+        self.assertEqual(sessions.flush_dirty(force=True), 1)
+        self.assertEqual(SessionStore(store.session_key)['key'], 'new')
+        self.assertEqual(sessions.flush_dirty(force=True), 0)
+
+    @mock.patch('core.sessions.CLEANUP_BATCH', 2)
+    def test_clear_expired_in_batches(self):
+        past = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create([
+            Session(session_key=f'expired{i}', session_data='',
+                    expire_date=past)
+            for i in range(5)
+        ])
+        SessionStore.clear_expired()
+        self.assertFalse(Session.objects.exists())
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.models import SlowQuery
+from core.slow_queries import normalize
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        Post.objects.create(author=self.user, text='Пост')
+        patcher = mock.patch('core.slow_queries.THRESHOLD', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize('SELECT  "a" FROM "t" WHERE "id" IN (%s, %s, %s)\n'
+                      "AND name = 'x''y' LIMIT 21"),
+            'SELECT "a" FROM "t" WHERE "id" IN (...) AND name = ? LIMIT ?',
+        )
+
+    def test_attributes_and_aggregates(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        cache.clear()
+        self.client.get(url)
+        entries = SlowQuery.objects.filter(view='posts:index')
+        self.assertTrue(entries.exists())
+        sources = set(entries.values_list('source', flat=True))
+        self.assertTrue(any(source.startswith('posts/index.html:')
+                            or source.startswith('posts/includes/')
+                            for source in sources), sources)
+        # счётчик постов считается вне шаблона — виден кадр Python
+        self.assertTrue(any('.py:' in source for source in sources),
+                        sources)
+        entry = entries.order_by('-count').first()
+        self.assertEqual(entry.count, 2)
+        self.assertEqual(len(entry.durations()), 2)
+        self.assertLessEqual(entry.p95(), entry.max_time)
+        self.assertNotIn('core_slowquery', ''.join(
+            SlowQuery.objects.values_list('sql', flat=True)))
+
+    def test_save_error_does_not_break_response(self):
+        error = OperationalError('database is locked')
+        with mock.patch('core.slow_queries.save', side_effect=error), \
+                self.assertLogs('core.middleware', 'WARNING'):
+            response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin(self):
+        self.client.get(reverse('posts:index'))
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get('/admin/core/slowquery/')
+        self.assertContains(response, 'posts:index')
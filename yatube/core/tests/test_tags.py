@@ -0,0 +1,38 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core import tags
+
+
+class TagsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_only_tagged_keys(self):
+        key = tags.tagged_key('fragment', ['post:1', 'author:1'])
+        other = tags.tagged_key('fragment', ['post:2'])
+        self.assertEqual(key, tags.tagged_key('fragment',
+                                              ['author:1', 'post:1']))
+        tags.bump('author:1')
+        self.assertNotEqual(tags.tagged_key('fragment',
+                                            ['post:1', 'author:1']), key)
+        self.assertEqual(tags.tagged_key('fragment', ['post:2']), other)
+
+    def test_evicted_version_does_not_repeat(self):
+        key = tags.tagged_key('fragment', ['group:a'])
+        tags.bump('group:a')
+        cache.delete(tags.version_key('group:a'))
+        tags.bump('group:a')
+        self.assertNotEqual(tags.tagged_key('fragment', ['group:a']), key)
+
+    def test_cached(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(tags.cached('key', ['feed:global'], compute, 60), 1)
+        self.assertEqual(tags.cached('key', ['feed:global'], compute, 60), 1)
+        tags.bump('feed:global')
+        self.assertEqual(tags.cached('key', ['feed:global'], compute, 60), 2)
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.throttling import consume
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(THROTTLE_RATES={'write': '2/min', 'list': '3/min',
+                                   'search': '1/min'})
+class ThrottleTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(ThrottleTest.user)
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(ThrottleTest.user)
+
+    def test_bucket_refuses_after_burst(self):
+        self.assertEqual(consume('write', 'ip:1'), 0)
+        self.assertEqual(consume('write', 'ip:1'), 0)
+        self.assertGreater(consume('write', 'ip:1'), 0)
+        self.assertEqual(consume('write', 'ip:2'), 0)
+
+    def test_unknown_scope_not_limited(self):
+        for _ in range(10):
+            self.assertEqual(consume('unknown', 'ip:1'), 0)
+
+    def test_add_comment_throttled(self):
+        url = reverse('posts:add_comment',
+                      kwargs={'post_id': ThrottleTest.post.pk})
+        for _ in range(2):
+            self.client.post(url, {'text': 'Комментарий'})
+        response = self.client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_get_of_create_page_not_throttled(self):
+        for _ in range(3):
+            response = self.client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_api_list_and_search_budgets(self):
+        url = '/api/v1/posts/'
+        self.assertEqual(self.api_client.get(url, {'author': 'author'})
+                         .status_code, HTTPStatus.OK)
+        response = self.api_client.get(url, {'author': 'author'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        for _ in range(3):
+            self.assertEqual(self.api_client.get(url).status_code,
+                             HTTPStatus.OK)
+        self.assertEqual(self.api_client.get(url).status_code,
+                         HTTPStatus.TOO_MANY_REQUESTS)
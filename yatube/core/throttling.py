@@ -0,0 +1,81 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60): объём ведра и период его полного наполнения."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_rate(scope):
+    rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+    return parse_rate(rate) if rate else None
+
+
+def get_ident(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def consume(scope, ident):
+    """Берёт токен из ведра, возвращает 0 или сколько секунд ждать.
+
+    Ведро хранится одним целым числом — теоретическим временем прихода
+    следующего запроса в миллисекундах (GCRA). Каждый запрос атомарно
+    увеличивает его через cache.incr, поэтому параллельные воркеры не
+    перетирают друг друга.
+    """
+    rate = get_rate(scope)
+    if rate is None:
+        return 0
+    count, period = rate
+    interval = period * 1000 // count
+    burst = interval * count
+    timeout = period + 1
+    key = f'throttle:{scope}:{ident}'
+    now = int(time.time() * 1000)
+
+    if cache.add(key, now + interval, timeout):
+        return 0
+    try:
+        tat = cache.incr(key, interval)
+    except ValueError:
+        cache.set(key, now + interval, timeout)
+        return 0
+    if tat - interval < now:
+        cache.set(key, now + interval, timeout)
+        return 0
+    if tat - now > burst:
+        cache.decr(key, interval)
+        return math.ceil((tat - now - burst) / 1000)
+    return 0
+
+
+def too_many_requests(request, wait):
+    response = render(request, 'core/429.html', {'wait': wait}, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def throttle(scope, methods=None):
+    """Ограничивает частоту вызова view ведром scope из THROTTLE_RATES."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = consume(scope, get_ident(request))
+                if wait:
+                    return too_many_requests(request, wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
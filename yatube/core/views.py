@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 
+from core.metrics import render as render_metrics
+
+METRICS_ALLOWED_IPS = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +21,11 @@ def server_error(request):
 
 def error_403(request, reason=''):
     return render(request, 'core/403.html')
+
+
+def metrics(request):
+    if (request.META.get('REMOTE_ADDR') not in METRICS_ALLOWED_IPS
+            and not request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,128 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Value
+from django.utils import timezone
+
+from core.cached import invalidate
+from core.tags import bump
+
+from . import tags
+from .counters import (all_key, archived_author_key, author_key, count_posts,
+                       group_key)
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .objects import group_cache, post_cache
+from .signals import bump_followers
+
+ARCHIVE_AFTER_DAYS = getattr(settings, 'POSTS_ARCHIVE_AFTER_DAYS', 365)
+BATCH_SIZE = 500
+# общие столбцы рабочей и архивной таблиц постов
+FIELDS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+
+
+def cutoff(days=ARCHIVE_AFTER_DAYS):
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(before, batch_size=BATCH_SIZE):
+    """Переносит в архив самые старые посты до before вместе с комментариями.
+
+    Всё в одной транзакции: строки копируются в архивные таблицы и
+    удаляются из рабочих без сигналов — для читателей пост не исчезает,
+    поэтому журнал синхронизации о нём ничего не узнаёт. Возвращает
+    перенесённые посты и число комментариев.
+    """
+    with transaction.atomic():
+        posts = list(Post.objects.filter(pub_date__lt=before)
+                     .order_by('pub_date', 'pk')[:batch_size])
+        if not posts:
+            return [], 0
+        ids = [post.pk for post in posts]
+        ArchivedPost.objects.bulk_create([
+            ArchivedPost(id=post.pk, text=post.text, pub_date=post.pub_date,
+                         author_id=post.author_id, group_id=post.group_id,
+                         image=post.image.name)
+            for post in posts
+        ])
+        comments = Comment.objects.filter(post_id__in=ids)
+        archived = ArchivedComment.objects.bulk_create([
+            ArchivedComment(id=pk, post_id=post_id, author_id=author_id,
+                            text=text, created=created)
+            for pk, post_id, author_id, text, created in comments.values_list(
+                'pk', 'post_id', 'author_id', 'text', 'created')
+        ], batch_size=batch_size)
+        comments._raw_delete(comments.db)
+        moved = Post.objects.filter(pk__in=ids)
+        moved._raw_delete(moved.db)
+    forget(posts)
+    return posts, len(archived)
+
+
+def forget(posts):
+    """Сбрасывает кэши, которые видели перенесённые посты в рабочей таблице."""
+    post_cache.forget_many(posts)
+    author_ids = {post.author_id for post in posts}
+    group_ids = {post.group_id for post in posts} - {None}
+    invalidate(all_key(),
+               *[author_key(pk) for pk in author_ids],
+               *[archived_author_key(pk) for pk in author_ids],
+               *[group_key(pk) for pk in group_ids])
+    bump(tags.FEED, *[tags.author_tag(pk) for pk in author_ids],
+         *[tags.group_tag(group.slug)
+           for group in group_cache.get_many(group_ids).values()])
+    bump_followers(author_ids)
+
+
+def archive_posts(before=None, batch_size=BATCH_SIZE, limit=None):
+    """Переносит в архив все посты старше before пачками по batch_size."""
+    before = before or cutoff()
+    total = {'posts': 0, 'comments': 0}
+    while limit is None or total['posts'] < limit:
+        size = batch_size
+        if limit is not None:
+            size = min(size, limit - total['posts'])
+        posts, comments = archive_batch(before, size)
+        if not posts:
+            break
+        total['posts'] += len(posts)
+        total['comments'] += comments
+    return total
+
+
+class AuthorPosts:
+    """Посты автора для постраничного вывода из рабочей и архивной таблиц.
+
+    Архивные посты обычно старше рабочих, но загрузка выгрузки может
+    положить в рабочую таблицу и старые посты, поэтому страница берётся
+    одним UNION ALL обеих таблиц, упорядоченным по дате. Оба количества
+    кэшируются.
+    """
+
+    def __init__(self, author_id):
+        self.hot = Post.objects.filter(author_id=author_id)
+        self.cold = ArchivedPost.objects.filter(author_id=author_id)
+        self.hot_key = author_key(author_id)
+        self.cold_key = archived_author_key(author_id)
+
+    def hot_count(self):
+        return count_posts(self.hot_key, self.hot)
+
+    def count(self):
+        return self.hot_count() + count_posts(self.cold_key, self.cold)
+
+    def __len__(self):
+        return self.count()
+
+    def rows(self, queryset, archived):
+        return queryset.order_by().annotate(
+            in_archive=Value(archived, output_field=BooleanField()),
+        ).values_list(*FIELDS, 'in_archive')
+
+    def __getitem__(self, index):
+        page = (self.rows(self.hot, False)
+                .union(self.rows(self.cold, True), all=True)
+                .order_by('-pub_date', '-id')[index])
+        db = self.hot.db
+        return [(ArchivedPost if row[-1] else Post).from_db(
+            db, FIELDS, row[:-1]) for row in page]
@@ -0,0 +1,248 @@
+import json
+import statistics
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import urls as api_urls
+from posts import urls as posts_urls
+from posts.follow_graph import follow_graph
+
+from .models import Follow, Group, Post, User
+
+ITERATIONS = 20
+WARMUP = 2
+THRESHOLD = 0.2
+PASSWORD = 'benchmark-password'
+
+# Адреса, которые бессмысленно мерить повторными запросами.
+SKIPPED = {
+    'events': 'бесконечный поток SSE',
+    'export': 'выгрузка всей базы, меряется отдельно',
+}
+
+
+class Case:
+    def __init__(self, name, client, method='get', args=None, data=None,
+                 query=None):
+        self.name = name
+        self.client = client
+        self.method = method
+        self.args = args or (lambda fixture: [])
+        self.data = data or (lambda fixture: {})
+        self.query = query or {}
+
+    def url(self, fixture):
+        return reverse(self.name, args=self.args(fixture))
+
+
+CASES = [
+    Case('posts:index', 'anonymous'),
+    Case('posts:index', 'anonymous', query={'page': 50}),
+    Case('posts:group_list', 'anonymous',
+         args=lambda fixture: [fixture['group'].slug]),
+    Case('posts:profile', 'anonymous',
+         args=lambda fixture: [fixture['author'].username]),
+    Case('posts:post_detail', 'anonymous',
+         args=lambda fixture: [fixture['post'].pk]),
+    Case('posts:follow_index', 'user'),
+    Case('posts:post_create', 'user'),
+    Case('posts:post_edit', 'user',
+         args=lambda fixture: [fixture['own_post'].pk]),
+    Case('posts:add_comment', 'user', method='post',
+         args=lambda fixture: [fixture['post'].pk],
+         data=lambda fixture: {'text': 'Комментарий'}),
+    Case('posts:profile_follow', 'user',
+         args=lambda fixture: [fixture['author'].username]),
+    Case('posts:profile_unfollow', 'user',
+         args=lambda fixture: [fixture['author'].username]),
+    Case('posts:bulk_follow', 'user', method='post',
+         data=lambda fixture: {'username': fixture['usernames']}),
+    Case('posts:bulk_unfollow', 'user', method='post',
+         data=lambda fixture: {'username': fixture['usernames']}),
+    Case('post-list', 'api'),
+    Case('post-list', 'api',
+         query={'author': 'AUTHOR', 'since': '2000-01-01'}),
+    Case('post-detail', 'api', args=lambda fixture: [fixture['post'].pk]),
+    Case('post-batch', 'api', query={'ids': 'POSTS'}),
+    Case('group-list', 'api'),
+    Case('group-detail', 'api', args=lambda fixture: [fixture['group'].pk]),
+    Case('comments-list', 'api', args=lambda fixture: [fixture['post'].pk]),
+    Case('comments-detail', 'api',
+         args=lambda fixture: [fixture['post'].pk, fixture['comment'].pk]),
+    Case('api-token-auth', 'anonymous', method='post',
+         data=lambda fixture: {'username': fixture['user'].username,
+                               'password': PASSWORD}),
+    Case('sync', 'api', query={'since': 0}),
+    Case('follow', 'api', method='post',
+         data=lambda fixture: {'usernames': fixture['usernames']}),
+    Case('unfollow', 'api', method='post',
+         data=lambda fixture: {'usernames': fixture['usernames']}),
+]
+
+
+def url_names():
+    """Имена всех адресов из posts/urls.py и api/urls.py."""
+    names = {f'{posts_urls.app_name}:{pattern.name}'
+             for pattern in posts_urls.urlpatterns}
+    names.update(pattern.name for pattern in api_urls.router.urls)
+    names.update(getattr(pattern, 'name', None) for pattern
+                 in api_urls.urlpatterns)
+    names.discard(None)
+    return names
+
+
+def uncovered():
+    covered = {case.name for case in CASES} | set(SKIPPED)
+    return sorted(url_names() - covered)
+
+
+def fixture():
+    """Объекты, на которых меряются адреса с параметрами."""
+    user, created = User.objects.get_or_create(username='benchmark')
+    if created:
+        user.set_password(PASSWORD)
+        user.save()
+    author_id = (Post.objects.exclude(author=user)
+                 .values_list('author_id', flat=True).first())
+    author = User.objects.get(pk=author_id)
+    post = (Post.objects.filter(comments__isnull=False).first()
+            or Post.objects.first())
+    usernames = list(User.objects.exclude(pk=user.pk)
+                     .values_list('username', flat=True)[:50])
+    author_ids = (User.objects.exclude(pk=user.pk)
+                  .values_list('pk', flat=True)[:100])
+    Follow.objects.bulk_create(
+        [Follow(user=user, author_id=pk) for pk in author_ids],
+        ignore_conflicts=True,
+    )
+    own_post = Post.objects.filter(author=user).first()
+    if own_post is None:
+        own_post = Post.objects.create(author=user, text='Пост для замеров')
+    return {
+        'user': user,
+        'author': author,
+        'group': Group.objects.first(),
+        'post': post,
+        'comment': post.comments.first(),
+        'own_post': own_post,
+        'usernames': usernames,
+        'post_ids': ','.join(map(str, Post.objects.values_list(
+            'pk', flat=True)[:100])),
+    }
+
+
+def make_clients(user):
+    user_client = Client()
+    user_client.force_login(user)
+    api_client = APIClient()
+    api_client.force_authenticate(user)
+    return {'anonymous': Client(), 'user': user_client, 'api': api_client}
+
+
+def query_params(case, data):
+    params = dict(case.query)
+    for name, value in params.items():
+        if value == 'AUTHOR':
+            params[name] = data['author'].username
+        elif value == 'POSTS':
+            params[name] = data['post_ids']
+    return params
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(case, client, data, iterations=ITERATIONS, warmup=WARMUP):
+    url = case.url(data)
+    params = query_params(case, data)
+
+    def request():
+        if case.method == 'get':
+            return client.get(url, params)
+        return client.post(url, case.data(data))
+
+    # команда benchmark подменяет кэш на отдельный файл рядом с базой
+    cache.clear()
+    started = time.perf_counter()
+    response = request()
+    cold = time.perf_counter() - started
+    for _ in range(warmup):
+        request()
+    durations = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = request()
+            durations.append(time.perf_counter() - started)
+        queries.append(len(context.captured_queries))
+    total = sum(durations)
+    return {
+        'url': url,
+        'method': case.method.upper(),
+        'status': response.status_code,
+        'iterations': iterations,
+        'cold_ms': round(cold * 1000, 3),
+        'mean_ms': round(total / iterations * 1000, 3),
+        'p50_ms': round(statistics.median(durations) * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'max_ms': round(max(durations) * 1000, 3),
+        'rps': round(iterations / total, 1) if total else None,
+        'queries': max(queries),
+    }
+
+
+def case_key(case):
+    if not case.query:
+        return case.name
+    return case.name + '?' + '&'.join(sorted(case.query))
+
+
+def run(iterations=ITERATIONS, warmup=WARMUP, only=None):
+    """Меряет все CASES и возвращает словарь результатов по ключу адреса."""
+    data = fixture()
+    clients = make_clients(data['user'])
+    follow_graph.reset()
+    results = {}
+    # замеры не должны упираться в ограничение частоты запросов
+    with override_settings(THROTTLE_RATES={}):
+        for case in CASES:
+            key = case_key(case)
+            if only and not any(name in key for name in only):
+                continue
+            results[key] = measure(case, clients[case.client], data,
+                                   iterations, warmup)
+    for name, reason in SKIPPED.items():
+        results[name] = {'skipped': reason}
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Регрессии относительно базовой выгрузки: p95 и число запросов."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get('results', {}).get(key)
+        if not base or 'skipped' in result or 'skipped' in base:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{key}: p95 {result["p95_ms"]} мс, '
+                f'было {base["p95_ms"]} мс')
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{key}: запросов {result["queries"]}, '
+                f'было {base["queries"]}')
+    return regressions
+
+
+def dump(meta, results):
+    return json.dumps({'meta': meta, 'results': results},
+                      ensure_ascii=False, indent=2, sort_keys=True)
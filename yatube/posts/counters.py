@@ -0,0 +1,32 @@
+from core.cached import get_or_compute, invalidate
+
+COUNT_TIMEOUT = 60
+
+
+def all_key():
+    return 'count:posts'
+
+
+def author_key(author_id):
+    return f'count:author:{author_id}'
+
+
+def archived_author_key(author_id):
+    return f'count:archived:author:{author_id}'
+
+
+def group_key(group_id):
+    return f'count:group:{group_id}'
+
+
+def count_posts(key, queryset):
+    return get_or_compute(key, queryset.count, COUNT_TIMEOUT)
+
+
+def forget_counts(post):
+    keys = [all_key(), author_key(post.author_id)]
+    # пост, перенесённый в другую группу, уменьшает и счётчик старой
+    group_ids = {post.group_id,
+                 getattr(post, '_previous_group_id', None)} - {None}
+    keys += [group_key(group_id) for group_id in group_ids]
+    invalidate(*keys)
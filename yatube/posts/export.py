@@ -0,0 +1,67 @@
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+# рабочая таблица, затем архивная: записи из архива помечены archived
+EXPORTS = {
+    'post': ((Post, ArchivedPost), {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+    }),
+    'comment': ((Comment, ArchivedComment), {
+        'id': 'id',
+        'post': 'post_id',
+        'text': 'text',
+        'created': 'created',
+        'author': 'author__username',
+    }),
+}
+
+
+def export_lines(kinds=tuple(EXPORTS), chunk_size=CHUNK_SIZE):
+    """Построчно отдаёт записи в формате NDJSON."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for kind in kinds:
+        (hot, cold), fields = EXPORTS[kind]
+        for model in (hot, cold):
+            rows = (model.objects.order_by('pk')
+                    .values_list(*fields.values())
+                    .iterator(chunk_size=chunk_size))
+            for row in rows:
+                record = dict(zip(fields, row))
+                record['type'] = kind
+                if model is cold:
+                    record['archived'] = True
+                yield encoder.encode(record) + '\n'
+
+
+def encode_stream(lines, compress=False, buffer_size=BUFFER_SIZE):
+    """Собирает строки в блоки байтов, при необходимости сжимая gzip."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            block = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = b''.join(buffer)
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
@@ -0,0 +1,178 @@
+import random
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+VERSION_KEY = 'follow-graph:version'
+DELTA_TTL = 3600
+MAX_REPLAY = 1000
+RELOAD = 'reload'
+EMPTY = array('I')
+
+
+def delta_key(version):
+    return f'follow-graph:delta:{version}'
+
+
+def contains(items, value):
+    index = bisect_left(items, value)
+    return index < len(items) and items[index] == value
+
+
+class FollowGraph:
+    """Граф подписок в памяти процесса.
+
+    Для каждого пользователя хранятся отсортированные array('I') с id
+    авторов, на которых он подписан, и с id подписчиков — это 4 байта на
+    ребро вместо ~70 у set. Граф загружается при первом обращении одним
+    проходом по Follow. Каждое изменение получает следующий номер версии
+    в общем кэше и кладёт рядом список своих рёбер; отставший процесс
+    проигрывает эти изменения по порядку и перечитывает граф из базы,
+    только если какого-то из них уже нет или отставание больше MAX_REPLAY.
+    """
+
+    def __init__(self):
+        self._following = {}
+        self._followers = {}
+        self._version = None
+        self._lock = threading.RLock()
+
+    def load(self, edges):
+        following = {}
+        followers = {}
+        for user_id, author_id in edges:
+            following.setdefault(user_id, array('I')).append(author_id)
+            followers.setdefault(author_id, array('I')).append(user_id)
+        for adjacency in (following, followers):
+            for items in adjacency.values():
+                if any(a > b for a, b in zip(items, items[1:])):
+                    items[:] = array('I', sorted(items))
+        with self._lock:
+            self._following = following
+            self._followers = followers
+
+    def _shared_version(self):
+        # случайное начало, как у версий тегов: вытесненный и заведённый
+        # заново счётчик не совпадёт со старыми изменениями
+        cache.add(VERSION_KEY, random.getrandbits(48), None)
+        return cache.get(VERSION_KEY)
+
+    def _ensure_loaded(self):
+        version = self._shared_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            if self._replay(version):
+                return
+            from posts.models import Follow
+            self.load(Follow.objects.order_by('user_id', 'author_id')
+                      .values_list('user_id', 'author_id')
+                      .iterator(chunk_size=10000))
+            self._version = version
+
+    def _replay(self, version):
+        """Догоняет version по журналу изменений; False — нужна загрузка."""
+        if (self._version is None or version is None
+                or not 0 < version - self._version <= MAX_REPLAY):
+            return False
+        versions = range(self._version + 1, version + 1)
+        found = cache.get_many([delta_key(number) for number in versions])
+        deltas = [found.get(delta_key(number)) for number in versions]
+        if any(delta is None or delta[0] == RELOAD for delta in deltas):
+            return False
+        for name, edges in deltas:
+            self._change(name, edges)
+        self._version = version
+        return True
+
+    def _bump_version(self):
+        self._shared_version()
+        try:
+            return cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, random.getrandbits(48), None)
+            return cache.get(VERSION_KEY)
+
+    def _publish(self, name, edges):
+        version = self._bump_version()
+        cache.set(delta_key(version), (name, edges), DELTA_TTL)
+        return version
+
+    def is_following(self, user_id, author_id):
+        self._ensure_loaded()
+        return contains(self._following.get(user_id, EMPTY), author_id)
+
+    def following_of(self, user_id):
+        self._ensure_loaded()
+        return self._following.get(user_id, EMPTY)
+
+    def followers_of(self, author_id):
+        self._ensure_loaded()
+        return self._followers.get(author_id, EMPTY)
+
+    def _insert(self, adjacency, key, value):
+        items = adjacency.setdefault(key, array('I'))
+        index = bisect_left(items, value)
+        if index == len(items) or items[index] != value:
+            items.insert(index, value)
+
+    def _discard(self, adjacency, key, value):
+        items = adjacency.get(key, EMPTY)
+        index = bisect_left(items, value)
+        if index < len(items) and items[index] == value:
+            del items[index]
+
+    def _change(self, name, edges):
+        operation = self._insert if name == 'add' else self._discard
+        for user_id, author_id in edges:
+            operation(self._following, user_id, author_id)
+            operation(self._followers, author_id, user_id)
+
+    def add(self, user_id, author_id):
+        self._apply('add', [(user_id, author_id)])
+
+    def remove(self, user_id, author_id):
+        self._apply('remove', [(user_id, author_id)])
+
+    def add_many(self, edges):
+        self._apply('add', edges)
+
+    def remove_many(self, edges):
+        self._apply('remove', edges)
+
+    def _apply(self, name, edges):
+        edges = [(user_id, author_id) for user_id, author_id in edges]
+        with self._lock:
+            version = self._publish(name, edges)
+            # своё изменение применяется сразу, только если перед ним не
+            # было чужих; иначе все они догонятся при следующем чтении
+            if self._version is not None and version == self._version + 1:
+                self._change(name, edges)
+                self._version = version
+
+    def invalidate(self):
+        """Заставляет все процессы перечитать граф из базы."""
+        with self._lock:
+            self._publish(RELOAD, [])
+
+    def reset(self):
+        with self._lock:
+            self._following = {}
+            self._followers = {}
+            self._version = None
+
+    def memory_usage(self):
+        total = sys.getsizeof(self._following) + sys.getsizeof(
+            self._followers)
+        for adjacency in (self._following, self._followers):
+            for key, items in adjacency.items():
+                total += sys.getsizeof(key) + sys.getsizeof(items)
+        return total
+
+
+follow_graph = FollowGraph()
@@ -0,0 +1,49 @@
+from django.db import transaction
+
+from core.tags import bump
+
+from . import tags
+from .follow_graph import follow_graph
+from .models import Follow, User
+from .signals import muted
+from .suggestions import mark_affected
+
+
+def resolve_authors(user, usernames):
+    """Одним запросом находит авторов по именам, кроме самого user."""
+    found = dict(User.objects.filter(username__in=set(usernames))
+                 .exclude(pk=user.pk).values_list('username', 'pk'))
+    missing = [name for name in usernames
+               if name not in found and name != user.username]
+    return found, missing
+
+
+def follows_changed(user_id, edges, created):
+    if created:
+        follow_graph.add_many(edges)
+    else:
+        follow_graph.remove_many(edges)
+    bump(tags.follow_tag(user_id))
+    mark_affected(edges)
+
+
+def bulk_follow(user, usernames):
+    found, missing = resolve_authors(user, usernames)
+    edges = [(user.pk, author_id) for author_id in found.values()]
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in edges],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: follows_changed(user.pk, edges, True))
+    return sorted(found), missing
+
+
+def bulk_unfollow(user, usernames):
+    found, missing = resolve_authors(user, usernames)
+    with muted():
+        Follow.objects.filter(user=user,
+                              author_id__in=found.values()).delete()
+    edges = [(user.pk, author_id) for author_id in found.values()]
+    transaction.on_commit(lambda: follows_changed(user.pk, edges, False))
+    return sorted(found), missing
@@ -0,0 +1,381 @@
+import http.client
+import random
+import statistics
+import threading
+import time
+from importlib import import_module
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.db import connection
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from .models import Group, Post, User
+
+SAMPLE_SIZE = 1000
+USERS = 50
+BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def feed(sample, rng):
+    return 'get', reverse('posts:index'), {'page': rng.randint(1, 5)}
+
+
+def group(sample, rng):
+    return 'get', reverse('posts:group_list',
+                          args=[rng.choice(sample['groups'])]), {}
+
+
+def profile(sample, rng):
+    return 'get', reverse('posts:profile',
+                          args=[rng.choice(sample['authors'])]), {}
+
+
+def post_detail(sample, rng):
+    return 'get', reverse('posts:post_detail',
+                          args=[rng.choice(sample['posts'])]), {}
+
+
+def follow_feed(sample, rng):
+    return 'get', reverse('posts:follow_index'), {}
+
+
+def comment(sample, rng):
+    return 'post', reverse('posts:add_comment',
+                           args=[rng.choice(sample['posts'])]), {
+        'text': 'Комментарий под нагрузкой'}
+
+
+def follow(sample, rng):
+    return 'get', reverse('posts:profile_follow',
+                          args=[rng.choice(sample['authors'])]), {}
+
+
+def api_poll(sample, rng):
+    return 'get', reverse('sync'), {'since': sample['token']}
+
+
+def api_posts(sample, rng):
+    return 'get', reverse('post-list'), {
+        'author': rng.choice(sample['authors'])}
+
+
+# вид запроса: (вес, кто отправляет, построитель запроса)
+MIX = {
+    'feed': (40, 'anonymous', feed),
+    'group': (8, 'anonymous', group),
+    'profile': (12, 'anonymous', profile),
+    'post': (15, 'anonymous', post_detail),
+    'follow_feed': (6, 'user', follow_feed),
+    'comment': (4, 'user', comment),
+    'follow': (3, 'user', follow),
+    'api_poll': (8, 'api', api_poll),
+    'api_posts': (4, 'api', api_posts),
+}
+# виды, которые пишут в базу: без явного разрешения не отправляются
+WRITES = {'comment', 'follow'}
+
+
+def load_sample(users=USERS, size=SAMPLE_SIZE):
+    """Случайные посты, авторы, группы и пользователи для запросов.
+
+    От имени сотрудников запросы не отправляются.
+    """
+    from api.sync import current_token
+
+    posts = list(Post.objects.order_by('?').values_list('pk', flat=True)
+                 [:size])
+    authors = list(User.objects.filter(posts__isnull=False).distinct()
+                   .order_by('?').values_list('username', flat=True)[:size])
+    if not posts or not authors:
+        raise ValueError('В базе нет постов — сначала заполните её')
+    if not User.objects.filter(is_active=True, is_staff=False,
+                               is_superuser=False).exists():
+        raise ValueError('Нет обычных активных пользователей')
+    return {
+        'posts': posts,
+        'authors': authors,
+        'groups': list(Group.objects.values_list('slug', flat=True)[:size])
+        or None,
+        'users': list(User.objects.filter(
+            is_active=True, is_staff=False, is_superuser=False)
+            .order_by('?')[:users]),
+        'token': current_token(),
+    }
+
+
+def session_store():
+    return import_module(settings.SESSION_ENGINE).SessionStore
+
+
+class Credentials:
+    """Токен и сессия, выданные на время прогона; discard() их удаляет."""
+
+    token = None
+    session_key = None
+
+    def issue_token(self, user):
+        token, created = Token.objects.get_or_create(user=user)
+        if created:
+            self.token = token
+        return token.key
+
+    def discard(self):
+        if self.token is not None:
+            self.token.delete()
+            self.token = None
+        if self.session_key is not None:
+            session_store()(self.session_key).delete()
+            self.session_key = None
+
+
+class InProcessSession(Credentials):
+    """Запросы через тестовый клиент Django в текущем процессе."""
+
+    def __init__(self, user=None, api=False):
+        self.client = Client()
+        self.headers = {}
+        if user is not None and api:
+            self.headers['HTTP_AUTHORIZATION'] = (
+                f'Token {self.issue_token(user)}')
+        elif user is not None:
+            self.client.force_login(user)
+            self.session_key = self.client.session.session_key
+
+    def request(self, method, path, params):
+        if method == 'get':
+            response = self.client.get(path, params, **self.headers)
+        else:
+            response = self.client.post(path, params, **self.headers)
+        return response.status_code
+
+    def close(self):
+        connection.close()
+
+
+def session_cookie(user):
+    session = session_store()()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = BACKEND
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+class HttpSession(Credentials):
+    """Запросы к запущенному серверу по одному keep-alive соединению."""
+
+    def __init__(self, base_url, user=None, api=False):
+        parts = urlsplit(base_url)
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+        self.headers = {}
+        if user is not None and api:
+            self.headers['Authorization'] = f'Token {self.issue_token(user)}'
+        elif user is not None:
+            csrf = _get_new_csrf_token()
+            self.session_key = session_cookie(user)
+            self.headers['Cookie'] = (
+                f'{settings.SESSION_COOKIE_NAME}={self.session_key}; '
+                f'{settings.CSRF_COOKIE_NAME}={csrf}')
+            self.headers['X-CSRFToken'] = csrf
+
+    def request(self, method, path, params):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host,
+                                                         timeout=30)
+        headers = dict(self.headers)
+        body = None
+        path = self.prefix + path
+        if method == 'get':
+            if params:
+                path = f'{path}?{urlencode(params)}'
+        else:
+            body = urlencode(params)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['Referer'] = f'http://{self.host}{path}'
+        try:
+            self.connection.request(method.upper(), path, body, headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        return response.status
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, kind, latency, status):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(latency)
+            counts = self.statuses.setdefault(kind, {})
+            counts[status] = counts.get(status, 0) + 1
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(latencies, statuses, elapsed):
+    total = len(latencies)
+    errors = sum(count for status, count in statuses.items()
+                 if status == 'error' or status >= 500
+                 or 400 <= status < 500 and status != 429)
+    throttled = statuses.get(429, 0)
+    if not total:
+        return {'requests': 0}
+    return {
+        'requests': total,
+        'rps': round(total / elapsed, 1),
+        'errors': errors,
+        'error_rate': round(errors / total, 4),
+        'throttled': throttled,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+        'statuses': {str(status): count
+                     for status, count in sorted(statuses.items(), key=str)},
+    }
+
+
+def worker(number, sessions, kinds, sample, recorder, deadline, budget,
+           think_time, seed):
+    rng = random.Random(seed + number)
+    weights = [MIX[kind][0] for kind in kinds]
+    try:
+        while time.monotonic() < deadline and budget():
+            kind = rng.choices(kinds, weights)[0]
+            _, role, build = MIX[kind]
+            method, path, params = build(sample, rng)
+            started = time.monotonic()
+            try:
+                status = sessions[role].request(method, path, params)
+            except Exception:
+                status = 'error'
+            recorder.add(kind, time.monotonic() - started, status)
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+    finally:
+        for session in sessions.values():
+            session.close()
+
+
+def run(workers=8, duration=30, requests=None, base_url=None,
+        think_time=0, throttle=True, writes=False, seed=0):
+    """Гоняет смесь MIX в workers потоках и возвращает сводку.
+
+    Без base_url запросы идут через тестовый клиент в этом же процессе,
+    с base_url — по HTTP к запущенному серверу. Останавливается через
+    duration секунд или после requests запросов, что наступит раньше.
+    Комментарии и подписки отправляются только с writes; выданные на
+    прогон токены и сессии в конце удаляются.
+    """
+    sample = load_sample()
+    kinds = [kind for kind in MIX
+             if (writes or kind not in WRITES)
+             and (kind != 'group' or sample['groups'])]
+    if base_url:
+        def make_session(user=None, api=False):
+            return HttpSession(base_url, user, api)
+    else:
+        make_session = InProcessSession
+    pool = []
+    try:
+        # сессии и токены создаются до старта, чтобы не попасть в замеры
+        for number in range(workers):
+            user = sample['users'][number % len(sample['users'])]
+            pool.append({'anonymous': make_session(),
+                         'user': make_session(user),
+                         'api': make_session(user, api=True)})
+        result = measure(pool, kinds, sample, duration, requests,
+                         think_time, throttle, seed)
+    finally:
+        for sessions in pool:
+            for session in sessions.values():
+                session.discard()
+    result.update({'mode': 'http' if base_url else 'in-process',
+                   'workers': workers, 'writes': writes})
+    return result
+
+
+def measure(pool, kinds, sample, duration, requests, think_time, throttle,
+            seed):
+    recorder = Recorder()
+    counter = {'left': requests}
+    counter_lock = threading.Lock()
+
+    def budget():
+        if counter['left'] is None:
+            return True
+        with counter_lock:
+            counter['left'] -= 1
+            return counter['left'] >= 0
+
+    rates = {} if not throttle else settings.THROTTLE_RATES
+    with override_settings(THROTTLE_RATES=rates):
+        started = time.monotonic()
+        deadline = started + duration
+        threads = [threading.Thread(target=worker, args=(
+            number, sessions, kinds, sample, recorder, deadline, budget,
+            think_time, seed)) for number, sessions in enumerate(pool)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+    all_latencies = []
+    all_statuses = {}
+    by_kind = {}
+    for kind, latencies in sorted(recorder.latencies.items()):
+        statuses = recorder.statuses[kind]
+        by_kind[kind] = summarize(latencies, statuses, elapsed)
+        all_latencies.extend(latencies)
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'total': summarize(all_latencies, all_statuses, elapsed),
+        'kinds': by_kind,
+    }
+
+
+def report(result):
+    """Таблица для терминала по результату run()."""
+    lines = [f'{result["mode"]}, потоков: {result["workers"]}, '
+             f'{result["elapsed_s"]} с'
+             + ('' if result['writes'] else ', только чтение')]
+    header = ('запрос', 'всего', 'rps', 'ошибки', '429', 'p50', 'p95',
+              'p99', 'max')
+    lines.append('{:<12}{:>8}{:>9}{:>8}{:>6}{:>9}{:>9}{:>9}{:>9}'
+                 .format(*header))
+    rows = list(result['kinds'].items()) + [('итого', result['total'])]
+    for kind, summary in rows:
+        if not summary['requests']:
+            continue
+        lines.append('{:<12}{:>8}{:>9}{:>8}{:>6}{:>9}{:>9}{:>9}{:>9}'.format(
+            kind, summary['requests'], summary['rps'], summary['errors'],
+            summary['throttled'], summary['p50_ms'], summary['p95_ms'],
+            summary['p99_ms'], summary['max_ms']))
+    return '\n'.join(lines)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.archive import (ARCHIVE_AFTER_DAYS, BATCH_SIZE, archive_posts,
+                           cutoff)
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Переносит посты старше заданного срока вместе с комментариями '
+            'в архивные таблицы')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS,
+                            help='Переносить посты старше стольких дней')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Постов в одной транзакции')
+        parser.add_argument('--limit', type=int,
+                            help='Перенести не больше стольких постов')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать, сколько постов уйдёт')
+
+    def handle(self, *args, **options):
+        if (options['days'] < 0 or options['batch_size'] < 1
+                or (options['limit'] is not None and options['limit'] < 0)):
+            raise CommandError(
+                'Нужны --days >= 0, --batch-size >= 1 и --limit >= 0')
+        before = cutoff(options['days'])
+        if options['dry_run']:
+            count = Post.objects.filter(pub_date__lt=before).count()
+            self.stdout.write(f'Будет перенесено постов: {count}')
+            return
+        total = archive_posts(before, options['batch_size'],
+                              options['limit'])
+        self.stdout.write(f'Перенесено постов: {total["posts"]}, '
+                          f'комментариев: {total["comments"]}')
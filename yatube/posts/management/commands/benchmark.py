@@ -0,0 +1,121 @@
+import json
+import os
+import platform
+import sys
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts import benchmarks
+from posts.models import Post
+from posts.seeding import SCALES, bulk_mode, seed
+
+VOLUMES = ('users', 'groups', 'posts', 'comments', 'follows')
+
+
+def remove_cache(path):
+    for name in (path, path + '-wal', path + '-shm'):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет отдельную базу данными заданного объёма и меряет '
+            'время ответа, пропускную способность и число запросов для '
+            'всех адресов posts и api')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small',
+                            help='Готовый набор объёмов данных')
+        for name in VOLUMES:
+            parser.add_argument(f'--{name}', type=int,
+                                help=f'Переопределить объём: {name}')
+        parser.add_argument('--database',
+                            default=os.path.join(settings.BASE_DIR, 'cache',
+                                                 'benchmark.sqlite3'),
+                            help='Файл базы для замеров')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Не пересоздавать заполненную базу')
+        parser.add_argument('--iterations', type=int,
+                            default=benchmarks.ITERATIONS)
+        parser.add_argument('--warmup', type=int, default=benchmarks.WARMUP)
+        parser.add_argument('--only', action='append',
+                            help='Мерить только адреса, содержащие строку')
+        parser.add_argument('--output', '-o',
+                            help='Файл для результатов JSON, иначе stdout')
+        parser.add_argument('--baseline',
+                            help='Результаты прошлого прогона для сравнения')
+        parser.add_argument('--threshold', type=float,
+                            default=benchmarks.THRESHOLD,
+                            help='Допустимый рост p95, доля (0.2 = 20%%)')
+
+    def measure(self, options, volumes):
+        # свой кэш рядом с базой замеров: замеры очищают его перед каждым
+        # адресом, а рабочий кэш остаётся нетронутым
+        cache_path = (os.path.splitext(options['database'])[0]
+                      + '-cache.sqlite3')
+        if not options['keepdb']:
+            remove_cache(cache_path)
+        caches = {'default': dict(settings.CACHES['default'],
+                                  LOCATION=cache_path)}
+        connection.settings_dict.setdefault('TEST', {})
+        connection.settings_dict['TEST']['NAME'] = options['database']
+        with override_settings(CACHES=caches):
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False,
+                keepdb=options['keepdb'])
+            try:
+                if not Post.objects.exists():
+                    self.stderr.write(f'Заполнение базы: {volumes}')
+                    with bulk_mode(drop_indexes=True):
+                        seed(**volumes)
+                self.stderr.write('Замеры...')
+                with override_settings(DEBUG=False):
+                    results = benchmarks.run(options['iterations'],
+                                             options['warmup'],
+                                             options['only'])
+            finally:
+                connection.creation.destroy_test_db(
+                    old_name, verbosity=0, keepdb=options['keepdb'])
+                if not options['keepdb']:
+                    remove_cache(cache_path)
+        return results
+
+    def handle(self, *args, **options):
+        missing = benchmarks.uncovered()
+        if missing:
+            raise CommandError(f'Нет замеров для адресов: {missing}')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+        volumes = dict(SCALES[options['scale']])
+        for name in VOLUMES:
+            if options[name] is not None:
+                volumes[name] = options[name]
+
+        results = self.measure(options, volumes)
+
+        meta = {
+            'date': timezone.now().isoformat(),
+            'scale': options['scale'],
+            'volumes': volumes,
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'platform': platform.platform(),
+        }
+        output = benchmarks.dump(meta, results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+        if baseline is not None:
+            regressions = benchmarks.compare(results, baseline,
+                                             options['threshold'])
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import CHUNK_SIZE, EXPORTS, encode_stream, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии в формате NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o',
+                            help='Файл для выгрузки, по умолчанию stdout')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжимать выгрузку gzip')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Сколько строк читать из БД за раз')
+        parser.add_argument('--only', choices=list(EXPORTS),
+                            help='Выгрузить только один тип записей')
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['output']:
+            raise CommandError('Для --gzip укажите файл через --output')
+        kinds = [options['only']] if options['only'] else list(EXPORTS)
+        blocks = encode_stream(
+            export_lines(kinds, chunk_size=options['chunk_size']),
+            compress=options['gzip'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for block in blocks:
+                    output.write(block)
+        else:
+            for block in blocks:
+                self.stdout.write(block.decode(), ending='')
@@ -0,0 +1,81 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Воспроизводит смешанную нагрузку (чтение ленты, профили, '
+            'комментарии, подписки, опрос API) несколькими потоками и '
+            'выводит пропускную способность, задержки и долю ошибок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', '-w', type=int, default=8,
+                            help='Число одновременных клиентов')
+        parser.add_argument('--duration', '-d', type=float, default=30,
+                            help='Длительность прогона, секунды')
+        parser.add_argument('--requests', '-n', type=int,
+                            help='Остановиться после этого числа запросов')
+        parser.add_argument('--url',
+                            help='Адрес запущенного сервера, например '
+                                 'http://127.0.0.1:8000; без него запросы '
+                                 'идут в этом же процессе')
+        parser.add_argument('--database',
+                            help='Файл SQLite вместо базы из настроек, '
+                                 'например заполненный командой benchmark; '
+                                 'с ним отправляются и пишущие запросы')
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='Писать комментарии и подписки в базу из '
+                                 'настроек')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Средняя пауза клиента между запросами, с')
+        parser.add_argument('--no-throttle', action='store_true',
+                            help='Отключить ограничение частоты запросов '
+                                 '(только без --url)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в JSON')
+        parser.add_argument('--output', '-o',
+                            help='Файл для результата, иначе stdout')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('Нужен хотя бы один поток')
+        caches = settings.CACHES
+        if options['database']:
+            connection.close()
+            connection.settings_dict['NAME'] = options['database']
+            # отдельный кэш, чтобы прогон не смешивался с рабочим
+            caches = {'default': dict(
+                caches['default'],
+                LOCATION=os.path.splitext(options['database'])[0]
+                + '-cache.sqlite3')}
+        try:
+            with override_settings(DEBUG=False, CACHES=caches):
+                result = loadtest.run(
+                    workers=options['workers'],
+                    duration=options['duration'],
+                    requests=options['requests'],
+                    base_url=options['url'],
+                    think_time=options['think_time'],
+                    throttle=not options['no_throttle'],
+                    writes=bool(options['database']
+                                or options['allow_writes']),
+                    seed=options['seed'],
+                )
+        except ValueError as error:
+            raise CommandError(error)
+        if options['json']:
+            output = json.dumps(result, ensure_ascii=False, indent=2)
+        else:
+            output = loadtest.report(result)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
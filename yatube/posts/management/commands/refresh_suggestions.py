@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import (BATCH_SIZE, refresh_all_suggestions,
+                               refresh_stale_suggestions)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает подсказки «кого почитать» для всех пользователей '
+            'или, с --stale, только устаревшие после новых подписок; '
+            'запускайте с --stale регулярно, например из cron')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Сколько пользователей считать за раз')
+        parser.add_argument('--stale', action='store_true',
+                            help='Только пользователи с устаревшими '
+                                 'подсказками')
+
+    def handle(self, *args, **options):
+        refresh = (refresh_stale_suggestions if options['stale']
+                   else refresh_all_suggestions)
+        total = refresh(batch_size=options['batch_size'])
+        self.stdout.write(f'Сохранено подсказок: {total}')
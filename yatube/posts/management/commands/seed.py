@@ -0,0 +1,97 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import (BATCH_SIZE, SCALES, bulk_mode, created_since,
+                           import_records, marks, read_ndjson, rebuild,
+                           restore_indexes, seed)
+
+VOLUMES = ('users', 'groups', 'posts', 'comments', 'follows')
+
+
+class Command(BaseCommand):
+    help = ('Быстро заполняет базу случайными данными или загружает '
+            'выгрузку export_ndjson, затем одним проходом пересчитывает '
+            'счётчики, кэши лент и подсказки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES),
+                            help='Готовый набор объёмов данных')
+        for name in VOLUMES:
+            parser.add_argument(f'--{name}', type=int,
+                                help=f'Сколько создать: {name}')
+        parser.add_argument('--import', dest='source',
+                            help='Файл NDJSON (можно .gz) или - для stdin')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Строк в одной транзакции')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора')
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Не пересчитывать счётчики и кэши')
+        parser.add_argument('--drop-indexes', action='store_true',
+                            help='Снять индексы на время вставки; только '
+                                 'если сайт с этой базой остановлен')
+        parser.add_argument('--restore-indexes', action='store_true',
+                            help='Только вернуть индексы, оставшиеся '
+                                 'снятыми после прерванной загрузки')
+
+    def open_source(self, source):
+        if source == '-':
+            return sys.stdin
+        if source.endswith('.gz'):
+            return gzip.open(source, 'rt', encoding='utf-8')
+        return open(source, encoding='utf-8')
+
+    def load(self, source, batch_size):
+        source = self.open_source(source)
+        try:
+            counts, touched = import_records(read_ndjson(source), batch_size)
+        except (KeyError, ValueError) as error:
+            raise CommandError(f'Ошибка в выгрузке: {error!r}')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+        self.stdout.write(f'Загружено: {counts}')
+        return touched
+
+    def handle(self, *args, **options):
+        if options['restore_indexes']:
+            restored = restore_indexes()
+            self.stdout.write(f'Возвращено индексов: {len(restored)}')
+            return
+        volumes = dict(SCALES[options['scale']]) if options['scale'] else {}
+        for name in VOLUMES:
+            if options[name] is not None:
+                volumes[name] = options[name]
+        if not volumes and not options['source']:
+            raise CommandError('Укажите --scale, объёмы или --import')
+
+        started = time.monotonic()
+        before = marks()
+        touched = {}
+        with bulk_mode(options['drop_indexes']):
+            if volumes:
+                created = seed(batch_size=options['batch_size'],
+                               seed=options['seed'], **volumes)
+                self.stdout.write(f'Создано: {created}')
+            if options['source']:
+                touched = self.load(options['source'], options['batch_size'])
+        loaded = time.monotonic()
+        self.stdout.write(f'Вставка: {loaded - started:.1f} с')
+
+        if options['no_rebuild']:
+            return
+        if volumes:
+            # случайные данные затрагивают всех — пересчитываем всё
+            created = created_since(before)
+            for name, ids in touched.get('created', {}).items():
+                created[name] = set(created[name]).union(ids)
+            result = rebuild(created=created)
+        else:
+            result = rebuild(touched['authors'], touched['groups'],
+                             touched['posts'], follows=False,
+                             created=touched['created'])
+        self.stdout.write(f'Пересчёт: {result}, '
+                          f'{time.monotonic() - loaded:.1f} с')
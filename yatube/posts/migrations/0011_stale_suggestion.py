@@ -0,0 +1,23 @@
+# Generated by Django 2.2 on 2026-10-19 13:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0010_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSuggestion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('marked', models.DateTimeField(auto_now_add=True, verbose_name='Дата пометки')),
+            ],
+        ),
+    ]
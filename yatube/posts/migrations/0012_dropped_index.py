@@ -0,0 +1,20 @@
+# Generated by Django 2.2 on 2026-10-19 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_stale_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DroppedIndex',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Имя')),
+                ('sql', models.TextField(verbose_name='SQL')),
+            ],
+        ),
+    ]
@@ -41,6 +41,14 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -58,6 +66,12 @@ class Comment(models.Model):
     created = models.DateTimeField('Дата публикации',
                                    auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -79,3 +93,108 @@ class Follow(models.Model):
     def __str__(self):
         return (f'Пользователь {self.user.username} подписан на '
                 f'пользователя {self.author.username}')
+
+
+class Suggestion(models.Model):
+    user = models.ForeignKey(User,
+                             related_name='suggestions',
+                             on_delete=models.CASCADE)
+    author = models.ForeignKey(User,
+                               related_name='suggested_to',
+                               on_delete=models.CASCADE)
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='unique-in-suggestion'),
+        ]
+
+    def __str__(self):
+        return (f'Пользователю {self.user.username} предложен '
+                f'автор {self.author.username}')
+
+
+class StaleSuggestion(models.Model):
+    """Пользователь, чьи подсказки устарели после изменения подписок.
+
+    Метки снимает refresh_suggestions --stale, пересчитывая подсказки
+    пачками вне запросов.
+    """
+    user = models.OneToOneField(User,
+                                primary_key=True,
+                                related_name='+',
+                                on_delete=models.CASCADE)
+    marked = models.DateTimeField('Дата пометки', auto_now_add=True)
+
+    def __str__(self):
+        return f'Подсказки пользователя {self.user_id} устарели'
+
+
+class DroppedIndex(models.Model):
+    """Индекс, снятый seed --drop-indexes на время загрузки.
+
+    Хранит исходный CREATE INDEX: если загрузку прервали, индекс вернёт
+    seed --restore-indexes ровно таким, каким он был.
+    """
+    name = models.CharField('Имя', max_length=100, primary_key=True)
+    sql = models.TextField('SQL')
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из posts_post командой archive_posts.
+
+    id совпадает с исходным: SQLite с AUTOINCREMENT не выдаёт его
+    повторно, поэтому ссылки на старые посты продолжают работать.
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='archived_posts',
+                               verbose_name='Автор')
+    group = models.ForeignKey(Group,
+                              related_name='archived_posts',
+                              on_delete=models.SET_NULL,
+                              blank=True,
+                              null=True,
+                              verbose_name='Группа')
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived = models.DateTimeField('Дата переноса в архив',
+                                    auto_now_add=True)
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='archived_author_pub_date_idx'),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(ArchivedPost,
+                             related_name='comments',
+                             on_delete=models.CASCADE)
+    author = models.ForeignKey(User,
+                               related_name='archived_comments',
+                               on_delete=models.CASCADE)
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='archived_post_created_idx'),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
@@ -0,0 +1,11 @@
+from core.objects import ObjectCache
+from users.identity import user_cache
+
+from .models import ArchivedPost, Group, Post
+
+group_cache = ObjectCache(Group, 'group', lookups=('slug',))
+post_cache = ObjectCache(Post, 'post',
+                         related={'author': user_cache, 'group': group_cache})
+archived_post_cache = ObjectCache(ArchivedPost, 'archived_post',
+                                  related={'author': user_cache,
+                                           'group': group_cache})
@@ -0,0 +1,37 @@
+"""Сколько запросов к базе может сделать каждый адрес при пустом кэше.
+
+Ключи — те же, что у замеров в posts.benchmarks (имя адреса и, если
+есть, параметры запроса). Число не должно зависеть от количества строк
+на странице: это проверяет posts/tests/test_query_budgets.py. Меняя
+шаблон или view, обновляйте бюджет осознанно и в том же коммите.
+"""
+
+BUDGETS = {
+    # число постов, страница, её авторы и группы — по запросу
+    'posts:index': 4,
+    'posts:index?page': 4,
+    'posts:group_list': 4,
+    # плюс число архивных постов автора
+    'posts:profile': 5,
+    'posts:post_detail': 6,
+    'posts:follow_index': 8,
+    'posts:post_create': 3,
+    'posts:post_edit': 5,
+    'posts:add_comment': 7,
+    'posts:profile_follow': 4,
+    'posts:profile_unfollow': 8,
+    'posts:bulk_follow': 7,
+    'posts:bulk_unfollow': 8,
+    'post-list': 1,
+    'post-list?author&since': 1,
+    'post-detail': 3,
+    'post-batch?ids': 3,
+    'group-list': 1,
+    'group-detail': 1,
+    'comments-list': 1,
+    'comments-detail': 1,
+    'api-token-auth': 5,
+    'sync?since': 4,
+    'follow': 5,
+    'unfollow': 6,
+}
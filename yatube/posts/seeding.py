@@ -0,0 +1,483 @@
+import json
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import Change
+from core.cached import invalidate, prime
+from core.tags import bump
+
+from . import tags
+from .counters import (COUNT_TIMEOUT, all_key, archived_author_key,
+                       author_key, group_key)
+from .follow_graph import follow_graph
+from .models import (ArchivedComment, ArchivedPost, Comment, DroppedIndex,
+                     Follow, Group, Post, User)
+from .signals import bump_followers, muted
+from .suggestions import refresh_all_suggestions
+
+BATCH_SIZE = 5000
+LOOKUP_SIZE = 500
+SPAN_DAYS = 3 * 365
+
+# на время загрузки: без fsync, журнал в памяти, кэш страниц побольше
+BULK_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'temp_store': 'MEMORY',
+    'cache_size': '-65536',
+}
+INDEXED_MODELS = (Post, Comment)
+# модели, о создании которых должен узнать журнал синхронизации api.Change
+LOGGED_MODELS = {'post': Post, 'comment': Comment}
+# по этим полям загружаемая строка сверяется с уже лежащей под тем же id
+POST_FIELDS = ('author_id', 'pub_date', 'text')
+COMMENT_FIELDS = ('post_id', 'author_id', 'created', 'text')
+
+SCALES = {
+    'tiny': {'users': 50, 'groups': 5, 'posts': 500, 'comments': 1000,
+             'follows': 500},
+    'small': {'users': 1000, 'groups': 20, 'posts': 20000,
+              'comments': 50000, 'follows': 20000},
+    'medium': {'users': 10000, 'groups': 100, 'posts': 500000,
+               'comments': 2000000, 'follows': 1000000},
+    'large': {'users': 100000, 'groups': 1000, 'posts': 5000000,
+              'comments': 20000000, 'follows': 10000000},
+}
+
+WORDS = ('лес', 'река', 'город', 'книга', 'утро', 'дорога', 'письмо',
+         'поезд', 'окно', 'музыка', 'снег', 'чай', 'море', 'сад', 'свет')
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Даёт bulk_create записать свои даты в поля с auto_now_add."""
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def next_pk(model):
+    return (model.objects.aggregate(pk=Max('pk'))['pk'] or 0) + 1
+
+
+def text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def insert(model, rows, total, batch_size, **kwargs):
+    """Вставляет строки из генератора пачками, каждая — в своей транзакции.
+
+    Возвращает диапазон pk вставленных строк: SQLite выдаёт их подряд,
+    но не обязательно с max(pk) + 1 — AUTOINCREMENT помнит удалённые.
+    """
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            batch = []
+    if batch:
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **kwargs)
+    last = next_pk(model)
+    return range(last - total, last)
+
+
+def seed(users=0, groups=0, posts=0, comments=0, follows=0,
+         batch_size=BATCH_SIZE, seed=0):
+    """Заполняет базу случайными данными заданного объёма.
+
+    Пароли не хэшируются (вход по ним невозможен), даты постов и
+    комментариев разбросаны по последним SPAN_DAYS дням. Возвращает
+    словарь с количеством созданных строк.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    prefix = f'seed{next_pk(User)}_'
+
+    user_ids = insert(User, (
+        User(username=f'{prefix}{index}', password='!',
+             first_name=text(rng, 1), last_name=text(rng, 1))
+        for index in range(users)
+    ), users, batch_size)
+    group_ids = insert(Group, (
+        Group(title=text(rng, 2)[:200], slug=f'{prefix}{index}',
+              description=text(rng, 12))
+        for index in range(groups)
+    ), groups, batch_size)
+    if not user_ids:
+        user_ids = list(User.objects.values_list('pk', flat=True))
+    if not group_ids:
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+
+    def age():
+        return timedelta(seconds=rng.randrange(SPAN_DAYS * 86400))
+
+    with explicit_dates(Post._meta.get_field('pub_date'),
+                        Comment._meta.get_field('created')):
+        post_ids = insert(Post, (
+            Post(author_id=rng.choice(user_ids),
+                 group_id=(rng.choice(group_ids)
+                           if group_ids and rng.random() < 0.6 else None),
+                 text=text(rng, rng.randint(5, 60)),
+                 pub_date=now - age())
+            for _ in range(posts)
+        ), posts, batch_size)
+        if not post_ids:
+            post_ids = list(Post.objects.values_list('pk', flat=True))
+        insert(Comment, (
+            Comment(post_id=rng.choice(post_ids),
+                    author_id=rng.choice(user_ids),
+                    text=text(rng, rng.randint(3, 20)),
+                    created=now - age())
+            for _ in range(comments)
+        ), comments, batch_size)
+
+    def follow_rows():
+        for _ in range(follows):
+            user_id, author_id = rng.choice(user_ids), rng.choice(user_ids)
+            if user_id != author_id:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    insert(Follow, follow_rows(), follows, batch_size, ignore_conflicts=True)
+    return {'users': users, 'groups': groups, 'posts': posts,
+            'comments': comments, 'follows': follows}
+
+
+def pragma(name, value=None):
+    with connection.cursor() as cursor:
+        if value is None:
+            cursor.execute(f'PRAGMA {name}')
+        else:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def remove_indexes():
+    """Снимает вторичные индексы постов и комментариев.
+
+    Исходный SQL каждого снятого индекса запоминается в DroppedIndex;
+    индексы, которых в базе нет (миграция ещё не применена), не трогаются.
+    """
+    names = [index.name for model in INDEXED_MODELS
+             for index in model._meta.indexes]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND name IN ({})".format(', '.join(['%s'] * len(names))), names)
+        found = cursor.fetchall()
+    with transaction.atomic():
+        DroppedIndex.objects.bulk_create(
+            [DroppedIndex(name=name, sql=sql) for name, sql in found],
+            ignore_conflicts=True)
+        with connection.cursor() as cursor:
+            for name, _ in found:
+                cursor.execute(
+                    f'DROP INDEX {connection.ops.quote_name(name)}')
+    return [name for name, _ in found]
+
+
+def restore_indexes():
+    """Возвращает индексы, снятые remove_indexes(), в том числе после сбоя."""
+    dropped = list(DroppedIndex.objects.order_by('name'))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for index in dropped:
+                cursor.execute(index.sql)
+        DroppedIndex.objects.filter(
+            name__in=[index.name for index in dropped]).delete()
+    return [index.name for index in dropped]
+
+
+@contextmanager
+def bulk_mode(drop_indexes=False):
+    """Настраивает базу под массовую вставку и возвращает всё обратно.
+
+    Обработчики сигналов заглушены. На SQLite вне транзакции дополнительно
+    ослабляются гарантии записи. С drop_indexes снимаются и вторичные
+    индексы постов и комментариев — только для базы, которой сейчас никто
+    не пользуется: они строятся заново одним проходом в конце, а если
+    загрузку прервали, их вернёт seed --restore-indexes.
+    """
+    tuned = connection.vendor == 'sqlite' and not connection.in_atomic_block
+    drop_indexes = tuned and drop_indexes
+    previous = {}
+    if tuned:
+        previous = {name: pragma(name) for name in BULK_PRAGMAS}
+        for name, value in BULK_PRAGMAS.items():
+            pragma(name, value)
+    if drop_indexes:
+        remove_indexes()
+    try:
+        with muted():
+            yield
+    finally:
+        if drop_indexes:
+            restore_indexes()
+        if tuned:
+            for name, value in previous.items():
+                pragma(name, value)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve(model, field, values, known, defaults):
+    """Дополняет known значениями pk по полю field, создавая недостающие."""
+    missing = sorted(set(values) - set(known) - {None, ''})
+    for chunk in chunks(missing, LOOKUP_SIZE):
+        model.objects.bulk_create(
+            [model(**{field: value}, **defaults(value)) for value in chunk],
+            ignore_conflicts=True,
+        )
+        known.update(model.objects.filter(**{f'{field}__in': chunk})
+                     .values_list(field, 'pk'))
+    return known
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise ValueError(f'Строка {number}: {error}')
+
+
+def import_records(records, batch_size=BATCH_SIZE):
+    """Загружает записи в формате выгрузки export_ndjson.
+
+    Посты и комментарии сохраняют свои id. Строки, которые уже есть в
+    базе или в архиве, пропускаются и считаются в skipped; id, занятый
+    другой записью, — ошибка ValueError. Посты с пометкой
+    archived ложатся в архив, как и комментарии к архивным постам.
+    Недостающие авторы создаются без пароля, группы — с названием по
+    slug. Возвращает число загруженных записей по типам и затронутых
+    авторов, группы, посты и id созданных строк для rebuild().
+    """
+    users = {}
+    groups = {}
+    counts = {'post': 0, 'comment': 0, 'skipped': 0}
+    touched = {'authors': set(), 'groups': set(), 'posts': set(),
+               'created': {'post': [], 'comment': []}}
+    with explicit_dates(Post._meta.get_field('pub_date'),
+                        Comment._meta.get_field('created')):
+        for chunk in chunks(records, batch_size):
+            resolve(User, 'username', [r.get('author') for r in chunk],
+                    users, lambda username: {'password': '!'})
+            resolve(Group, 'slug', [r.get('group') for r in chunk
+                                    if r.get('type') == 'post'],
+                    groups, lambda slug: {'title': slug[:200]})
+            rows = [build(record, users, groups) for record in chunk]
+            posts, skipped = fresh(
+                [row for row in rows if type(row) is Post],
+                POST_FIELDS, Post, ArchivedPost)
+            cold, skipped_cold = fresh(
+                [row for row in rows if type(row) is ArchivedPost],
+                POST_FIELDS, Post, ArchivedPost)
+            comments, skipped_comments = fresh(
+                [row for row in rows if type(row) is Comment],
+                COMMENT_FIELDS, Comment, ArchivedComment)
+            comments, archived = route_comments(
+                comments, {post.pk for post in cold})
+            counts['skipped'] += skipped + skipped_cold + skipped_comments
+            with transaction.atomic():
+                Post.objects.bulk_create(posts, ignore_conflicts=True)
+                Comment.objects.bulk_create(comments, ignore_conflicts=True)
+                ArchivedPost.objects.bulk_create(cold, ignore_conflicts=True)
+                ArchivedComment.objects.bulk_create(archived,
+                                                    ignore_conflicts=True)
+            counts['post'] += len(posts) + len(cold)
+            counts['comment'] += len(comments) + len(archived)
+            touched['created']['post'] += [post.pk for post in posts]
+            touched['created']['comment'] += [
+                comment.pk for comment in comments]
+            touched['authors'].update(post.author_id
+                                      for post in posts + cold)
+            touched['groups'].update(post.group_id for post in posts + cold
+                                     if post.group_id)
+            touched['posts'].update(comment.post_id
+                                    for comment in comments + archived)
+    return counts, touched
+
+
+def build(record, users, groups):
+    """Строка модели по записи выгрузки.
+
+    Куда положить комментарий, решает route_comments() — по тому, где
+    лежит его пост.
+    """
+    kind = record.get('type')
+    if kind == 'post':
+        model = ArchivedPost if record.get('archived') else Post
+        return model(
+            id=record['id'], text=record['text'],
+            pub_date=parse_datetime(record['pub_date']),
+            author_id=users[record['author']],
+            group_id=groups.get(record.get('group')),
+            image=record.get('image') or '')
+    if kind == 'comment':
+        return Comment(
+            id=record['id'], post_id=record['post'], text=record['text'],
+            created=parse_datetime(record['created']),
+            author_id=users[record['author']])
+    raise ValueError(f'Неизвестный тип записи: {kind}')
+
+
+def existing(model, ids):
+    found = set()
+    for chunk in chunks(ids, LOOKUP_SIZE):
+        found.update(model.objects.filter(pk__in=chunk).values_list(
+            'pk', flat=True))
+    return found
+
+
+def signature(values):
+    # выгрузка хранит время с точностью до миллисекунд
+    return tuple(value.replace(microsecond=value.microsecond // 1000 * 1000)
+                 if isinstance(value, datetime) else value
+                 for value in values)
+
+
+def fresh(objects, fields, *models):
+    """Объекты с ещё не занятыми pk, без повторов, и число пропущенных.
+
+    Занятый pk пропускается, только если в одной из models лежит та же
+    запись (совпадают fields), иначе ValueError: молча пропустить её
+    значило бы приписать комментарии к чужому посту.
+    """
+    objects = list(objects)
+    unique = {obj.pk: obj for obj in objects}
+    taken = {}
+    for model in models:
+        for chunk in chunks(unique, LOOKUP_SIZE):
+            taken.update((pk, signature(values)) for pk, *values in
+                         model.objects.filter(pk__in=chunk)
+                         .values_list('pk', *fields))
+    result = []
+    for pk, obj in unique.items():
+        if pk not in taken:
+            result.append(obj)
+        elif taken[pk] != signature(getattr(obj, field) for field in fields):
+            raise ValueError(f'{obj._meta.verbose_name} с id {pk} уже '
+                             f'есть и не совпадает с загружаемым')
+    return result, len(objects) - len(result)
+
+
+def route_comments(comments, cold=()):
+    """Делит комментарии на рабочие и архивные — к архивным постам.
+
+    cold — id архивных постов, ещё не записанных в базу.
+    """
+    cold = set(cold) | existing(
+        ArchivedPost, {comment.post_id for comment in comments})
+    archived = [ArchivedComment(id=comment.pk, post_id=comment.post_id,
+                                author_id=comment.author_id,
+                                text=comment.text, created=comment.created)
+                for comment in comments if comment.post_id in cold]
+    return [comment for comment in comments
+            if comment.post_id not in cold], archived
+
+
+def marks():
+    """Первые pk, которые получат новые посты и комментарии."""
+    return {name: next_pk(model) for name, model in LOGGED_MODELS.items()}
+
+
+def created_since(marks):
+    return {name: list(LOGGED_MODELS[name].objects.filter(pk__gte=mark)
+                       .values_list('pk', flat=True))
+            for name, mark in marks.items()}
+
+
+def log_created(created):
+    """Дописывает в журнал api.Change строки, вставленные без сигналов."""
+    total = 0
+    for name, ids in created.items():
+        for chunk in chunks(sorted(ids), BATCH_SIZE):
+            with transaction.atomic():
+                Change.objects.bulk_create([
+                    Change(model=name, object_id=pk, action=Change.CREATED)
+                    for pk in chunk])
+            total += len(chunk)
+    return total
+
+
+def prime_counts():
+    """Кладёт в кэш счётчики постов: по одному GROUP BY на измерение."""
+    counts = {all_key(): Post.objects.count()}
+    for author_id, total in (Post.objects.order_by().values_list('author_id')
+                             .annotate(total=Count('pk'))):
+        counts[author_key(author_id)] = total
+    for group_id, total in (Post.objects.exclude(group=None).order_by()
+                            .values_list('group_id')
+                            .annotate(total=Count('pk'))):
+        counts[group_key(group_id)] = total
+    for chunk in chunks(counts.items(), LOOKUP_SIZE):
+        prime(dict(chunk), COUNT_TIMEOUT)
+    return len(counts)
+
+
+def rebuild(authors=None, groups=None, posts=(), follows=True, created=None):
+    """Пересчитывает то, что при обычной записи делают сигналы.
+
+    Созданные посты и комментарии (created — id по имени модели)
+    дописываются в журнал синхронизации, счётчики постов кладутся в кэш
+    готовыми, теги фрагментов авторов,
+    групп и постов поднимаются (None — у всех), граф подписок
+    перечитывается всеми процессами, а подсказки «кого почитать»
+    пересчитываются, если менялись подписки.
+    """
+    changes = log_created(created or {})
+    primed = prime_counts()
+    if authors is None:
+        authors = User.objects.values_list('pk', flat=True)
+    group_slugs = Group.objects.values_list('slug', flat=True)
+    if groups is not None:
+        group_slugs = []
+        for chunk in chunks(groups, LOOKUP_SIZE):
+            group_slugs += Group.objects.filter(pk__in=chunk).values_list(
+                'slug', flat=True)
+    bump(tags.FEED)
+    for chunk in chunks(authors, LOOKUP_SIZE):
+        bump(*map(tags.author_tag, chunk))
+        invalidate(*map(archived_author_key, chunk))
+        bump_followers(chunk)
+    for chunk in chunks(group_slugs, LOOKUP_SIZE):
+        bump(*map(tags.group_tag, chunk))
+    for chunk in chunks(posts, LOOKUP_SIZE):
+        bump(*map(tags.post_tag, chunk))
+
+    suggestions = 0
+    if follows:
+        follow_graph.invalidate()
+        for chunk in chunks(Follow.objects.values_list('user_id', flat=True)
+                            .distinct().iterator(), LOOKUP_SIZE):
+            bump(*map(tags.follow_tag, chunk))
+        suggestions = refresh_all_suggestions()
+    return {'changes': changes, 'counters': primed,
+            'suggestions': suggestions}
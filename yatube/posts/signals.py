@@ -0,0 +1,129 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from core.cached import invalidate
+from core.tags import bump
+
+from . import tags
+from .counters import archived_author_key, forget_counts
+from .follow_graph import follow_graph
+from .models import ArchivedPost, Comment, Follow, Group, Post
+from .objects import archived_post_cache, group_cache, post_cache
+from .suggestions import mark_affected
+
+User = get_user_model()
+
+_state = threading.local()
+
+
+@contextmanager
+def muted():
+    """Отключает обработчики ниже на время пакетных операций.
+
+    Пакетный код сам сбрасывает зависимые кэши один раз на всю пачку.
+    """
+    previous = getattr(_state, 'muted', False)
+    _state.muted = True
+    try:
+        yield
+    finally:
+        _state.muted = previous
+
+
+def is_muted():
+    return getattr(_state, 'muted', False)
+
+
+def follow_changed(user_id, author_id, created):
+    if created:
+        follow_graph.add(user_id, author_id)
+    else:
+        follow_graph.remove(user_id, author_id)
+    bump(tags.follow_tag(user_id))
+    mark_affected([(user_id, author_id)])
+
+
+def bump_followers(author_ids):
+    """Сбрасывает ленты подписок всех подписчиков авторов."""
+    bump(*[tags.follow_tag(user_id) for author_id in set(author_ids)
+           for user_id in follow_graph.followers_of(author_id)])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created and not is_muted():
+        transaction.on_commit(lambda: follow_changed(
+            instance.user_id, instance.author_id, True))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    if not is_muted():
+        transaction.on_commit(lambda: follow_changed(
+            instance.user_id, instance.author_id, False))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, created=None, **kwargs):
+    forget_counts(instance)
+    post_cache.forget(instance)
+    group_ids = {instance.group_id,
+                 getattr(instance, '_previous_group_id', None)} - {None}
+    bump(tags.FEED, tags.post_tag(instance.pk),
+         tags.author_tag(instance.author_id),
+         *[tags.group_tag(group.slug)
+           for group in group_cache.get_many(group_ids).values()])
+    # правка поста не сдвигает ленты подписок, а новый и удалённый — да
+    if created is not False:
+        bump_followers([instance.author_id])
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    # пост, перенесённый в другую группу, должен пропасть и из старой
+    if instance.pk and not raw:
+        instance._previous_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump(tags.post_tag(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    group_cache.forget(instance)
+    bump(tags.FEED, tags.group_tag(instance.slug))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump(tags.author_tag(instance.pk))
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    # SET_NULL обновляет посты одним UPDATE без сигналов
+    post_cache.forget_many(instance.posts.only('pk'))
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def archived_post_deleted(sender, instance, **kwargs):
+    archived_post_cache.forget(instance)
+    invalidate(archived_author_key(instance.author_id))
+    bump(tags.post_tag(instance.pk), tags.author_tag(instance.author_id))
@@ -0,0 +1,125 @@
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from .follow_graph import follow_graph
+from .models import StaleSuggestion, Suggestion, User
+
+SUGGESTIONS_LIMIT = getattr(settings, 'FOLLOW_SUGGESTIONS_LIMIT', 10)
+MAX_NEIGHBOURS = getattr(settings, 'FOLLOW_SUGGESTIONS_MAX_NEIGHBOURS', 200)
+COFOLLOW_WEIGHT = 0.5
+BATCH_SIZE = 500
+
+
+def score_user(user_id, graph=follow_graph):
+    """Оценивает кандидатов для одного пользователя.
+
+    Друзья друзей: каждый автор, на которого подписан тот, на кого
+    подписан пользователь, получает 1. Совместные подписки: авторы,
+    на которых подписаны другие подписчики тех же авторов, получают
+    COFOLLOW_WEIGHT. Соседей каждой вершины берём не больше
+    MAX_NEIGHBOURS, чтобы популярные авторы не раздували обход.
+    """
+    following = graph.following_of(user_id)
+    scores = Counter()
+    cofollowers = Counter()
+    for author_id in islice(following, MAX_NEIGHBOURS):
+        scores.update(islice(graph.following_of(author_id), MAX_NEIGHBOURS))
+        cofollowers.update(islice(graph.followers_of(author_id),
+                                  MAX_NEIGHBOURS))
+    cofollowers.pop(user_id, None)
+    for cofollower_id, common in cofollowers.most_common(MAX_NEIGHBOURS):
+        weight = COFOLLOW_WEIGHT * common
+        for author_id in islice(graph.following_of(cofollower_id),
+                                MAX_NEIGHBOURS):
+            scores[author_id] += weight
+    scores.pop(user_id, None)
+    for author_id in following:
+        scores.pop(author_id, None)
+    return scores.most_common(SUGGESTIONS_LIMIT)
+
+
+def refresh_suggestions(user_ids):
+    """Пересчитывает и сохраняет подсказки для переданных пользователей."""
+    user_ids = list(user_ids)
+    rows = [
+        Suggestion(user_id=user_id, author_id=author_id, score=score)
+        for user_id in user_ids
+        for author_id, score in score_user(user_id)
+    ]
+    with transaction.atomic():
+        Suggestion.objects.filter(user_id__in=user_ids).delete()
+        Suggestion.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def affected_users(edges, graph=follow_graph):
+    """Чьи подсказки меняет появление или исчезновение подписок edges.
+
+    Сам подписчик; его подписчики — для них автор стал другом друга;
+    подписчики автора — для них подписчик стал совместным. Соседей
+    каждой вершины берём не больше MAX_NEIGHBOURS.
+    """
+    user_ids = set()
+    for user_id, author_id in edges:
+        user_ids.add(user_id)
+        user_ids.update(islice(graph.followers_of(user_id), MAX_NEIGHBOURS))
+        user_ids.update(islice(graph.followers_of(author_id),
+                               MAX_NEIGHBOURS))
+    return user_ids
+
+
+def mark_stale(user_ids):
+    StaleSuggestion.objects.bulk_create(
+        [StaleSuggestion(user_id=user_id) for user_id in user_ids],
+        batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def mark_affected(edges):
+    """Помечает подсказки, устаревшие из-за подписок; пересчёт — в фоне."""
+    mark_stale(affected_users(edges))
+
+
+def refresh_stale_suggestions(batch_size=BATCH_SIZE):
+    """Пересчитывает подсказки помеченных пользователей пачками.
+
+    Метки пачки снимаются до пересчёта: если пользователя пометят снова,
+    пока пачка считается, он попадёт в следующую.
+    """
+    total = 0
+    while True:
+        user_ids = list(StaleSuggestion.objects.order_by('marked')
+                        .values_list('user_id', flat=True)[:batch_size])
+        if not user_ids:
+            return total
+        StaleSuggestion.objects.filter(user_id__in=user_ids).delete()
+        try:
+            total += refresh_suggestions(user_ids)
+        except BaseException:
+            mark_stale(user_ids)
+            raise
+
+
+def refresh_all_suggestions(batch_size=BATCH_SIZE):
+    """Пересчитывает подсказки для всех пользователей пачками."""
+    StaleSuggestion.objects.all().delete()
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    batch = []
+    total = 0
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            total += refresh_suggestions(batch)
+            batch = []
+    if batch:
+        total += refresh_suggestions(batch)
+    return total
+
+
+def suggestions_for(user, limit=5):
+    if not user.is_authenticated:
+        return []
+    return list(Suggestion.objects.filter(user=user)
+                .select_related('author')[:limit])
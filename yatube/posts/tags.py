@@ -0,0 +1,17 @@
+FEED = 'feed:global'
+
+
+def post_tag(pk):
+    return f'post:{pk}'
+
+
+def author_tag(pk):
+    return f'author:{pk}'
+
+
+def group_tag(slug):
+    return f'group:{slug}'
+
+
+def follow_tag(user_id):
+    return f'follow:{user_id}'
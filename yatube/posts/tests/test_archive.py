@@ -0,0 +1,170 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import Change
+from posts.archive import archive_posts, cutoff
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Group,
+                          Post)
+from posts.seeding import explicit_dates, import_records, read_ndjson
+
+User = get_user_model()
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        now = timezone.now()
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            self.old = [Post.objects.create(
+                author=self.user, group=self.group, text=f'Старый {i}',
+                pub_date=now - timedelta(days=400 + i)) for i in range(12)]
+        self.new = [Post.objects.create(author=self.user, text=f'Новый {i}')
+                    for i in range(5)]
+        Comment.objects.create(author=self.user, post=self.old[0],
+                               text='Старый комментарий')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_archive_moves_old_posts(self):
+        # пост уже в кэше и в счётчиках
+        self.client.get(reverse('posts:post_detail', args=[self.old[0].pk]))
+        self.client.get(reverse('posts:index'))
+        changes = Change.objects.count()
+        out = StringIO()
+        call_command('archive_posts', '--days', '365', '--batch-size', '5',
+                     stdout=out)
+        self.assertIn('Перенесено постов: 12', out.getvalue())
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedComment.objects.get().post_id,
+                         self.old[0].pk)
+        self.assertEqual(Change.objects.count(), changes)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 5)
+        self.assertEqual(archive_posts(cutoff(365)),
+                         {'posts': 0, 'comments': 0})
+
+    def test_views_fall_back_to_archive(self):
+        archive_posts(cutoff(365), batch_size=5)
+        old = self.old[0]
+        response = self.client.get(
+            reverse('posts:post_detail', args=[old.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['count'], 17)
+        self.assertContains(response, 'Старый комментарий')
+        self.assertNotContains(response, 'Добавить комментарий')
+        response = self.client.post(
+            reverse('posts:add_comment', args=[old.pk]), {'text': 'Новый'})
+        self.assertEqual(response.status_code, 404)
+
+        url = reverse('posts:profile', args=['author'])
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(first.paginator.count, 17)
+        # вторая страница — на стыке рабочей и архивной таблиц
+        second = list(self.client.get(url, {'page': 2})
+                      .context['page_obj'])
+        self.assertEqual([post.text for post in first][:5],
+                         [f'Новый {i}' for i in range(4, -1, -1)])
+        self.assertEqual([post.pk for post in second],
+                         [post.pk for post in self.old[5:]])
+        self.assertEqual(second[0].group, self.group)
+
+    def test_api_falls_back_to_archive(self):
+        archive_posts(cutoff(365))
+        old = self.old[0]
+        response = self.api.get(f'/api/v1/posts/{old.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author'], 'author')
+        self.assertEqual(response.data['group'], self.group.pk)
+        response = self.api.patch(f'/api/v1/posts/{old.pk}/',
+                                  {'text': 'Правка'})
+        self.assertEqual(response.status_code, 403)
+        response = self.api.get(f'/api/v1/posts/{old.pk}/comments/')
+        self.assertEqual([comment['text'] for comment in response.data],
+                         ['Старый комментарий'])
+        response = self.api.get('/api/v1/posts/batch/',
+                                {'ids': f'{old.pk},{self.new[0].pk},999'})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(response.data['missing'], [999])
+        self.assertEqual(self.api.get('/api/v1/posts/999/').status_code,
+                         404)
+
+    def test_profile_merges_old_hot_posts(self):
+        archive_posts(cutoff(365))
+        # загруженный после переноса старый пост остаётся в рабочей таблице
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            oldest = Post.objects.create(
+                author=self.user, text='Загруженный',
+                pub_date=timezone.now() - timedelta(days=1000))
+        page = self.client.get(reverse('posts:profile', args=['author']),
+                               {'page': 2}).context['page_obj']
+        self.assertEqual([post.pk for post in page],
+                         [post.pk for post in self.old[5:]] + [oldest.pk])
+        self.assertIsInstance(page[0], ArchivedPost)
+        self.assertIsInstance(page[-1], Post)
+
+    def test_import_skips_archived_ids(self):
+        archive_posts(cutoff(365))
+        old = self.old[0]
+        counts, _ = import_records([
+            {'type': 'post', 'id': old.pk, 'text': old.text,
+             'pub_date': old.pub_date.isoformat(), 'author': 'author'},
+            {'type': 'comment', 'id': 1000, 'post': old.pk,
+             'text': 'Поздний', 'created': old.pub_date.isoformat(),
+             'author': 'author'},
+        ])
+        self.assertEqual(counts, {'post': 0, 'comment': 1, 'skipped': 1})
+        self.assertFalse(Post.objects.filter(pk=old.pk).exists())
+        self.assertEqual(ArchivedComment.objects.get(pk=1000).post_id,
+                         old.pk)
+        with self.assertRaises(ValueError):
+            import_records([
+                {'type': 'post', 'id': old.pk, 'text': 'Дубль',
+                 'pub_date': old.pub_date.isoformat(), 'author': 'author'},
+            ])
+
+    def test_negative_limit_rejected(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_posts', '--limit', '-1', stdout=StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), 0)
+
+    def test_deleting_archived_post_updates_profile(self):
+        archive_posts(cutoff(365))
+        url = reverse('posts:profile', args=['author'])
+        self.assertEqual(self.client.get(url).context['count'], 17)
+        ArchivedPost.objects.get(pk=self.old[0].pk).delete()
+        self.assertEqual(self.client.get(url).context['count'], 16)
+
+    def test_export_import_round_trip(self):
+        archive_posts(cutoff(365))
+        out = StringIO()
+        call_command('export_ndjson', stdout=out)
+        archived = [line for line in out.getvalue().splitlines()
+                    if '"archived": true' in line]
+        self.assertEqual(len(archived), 13)
+        ArchivedPost.objects.all().delete()
+        Post.objects.all().delete()
+        counts, _ = import_records(read_ndjson(StringIO(out.getvalue())))
+        self.assertEqual(counts, {'post': 17, 'comment': 1, 'skipped': 0})
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old})
+        self.assertEqual(ArchivedComment.objects.get().post_id,
+                         self.old[0].pk)
+        self.assertEqual(ArchivedPost.objects.get(pk=self.old[0].pk).group,
+                         self.group)
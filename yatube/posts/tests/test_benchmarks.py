@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import benchmarks
+from posts.models import Comment, Follow, Post, User
+from posts.seeding import seed
+
+
+class SeedTest(TestCase):
+    def test_seed_volumes(self):
+        seed(users=20, groups=3, posts=100, comments=50, follows=40,
+             batch_size=30)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertTrue(0 < Follow.objects.count() <= 40)
+        dates = set(Post.objects.values_list('pub_date', flat=True))
+        self.assertGreater(len(dates), 1)
+
+    def test_seed_after_deleted_rows(self):
+        # AUTOINCREMENT не выдаёт заново pk удалённых строк: новые id
+        # начинаются не с max(pk) + 1
+        seed(users=5, posts=10)
+        Post.objects.filter(pk__in=Post.objects.order_by('-pk')
+                            .values_list('pk', flat=True)[:5]).delete()
+        seed(posts=10, comments=30)
+        post_ids = set(Post.objects.values_list('pk', flat=True))
+        self.assertEqual(len(post_ids), 15)
+        self.assertLessEqual(
+            set(Comment.objects.values_list('post_id', flat=True)), post_ids)
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_every_url_is_covered(self):
+        self.assertEqual(benchmarks.uncovered(), [])
+
+    def test_run(self):
+        seed(users=10, groups=2, posts=30, comments=30, follows=10)
+        results = benchmarks.run(iterations=2, warmup=0,
+                                 only=['posts:index', 'post-detail'])
+        self.assertEqual(set(results), {'posts:index', 'posts:index?page',
+                                        'post-detail', 'events', 'export'})
+        self.assertEqual(results['post-detail']['status'], 200)
+        self.assertEqual(results['posts:index']['iterations'], 2)
+
+    def test_compare(self):
+        baseline = {'results': {
+            'posts:index': {'p95_ms': 10, 'queries': 2},
+            'events': {'skipped': 'поток'},
+        }}
+        results = {
+            'posts:index': {'p95_ms': 11.5, 'queries': 3},
+            'posts:profile': {'p95_ms': 100, 'queries': 9},
+            'events': {'skipped': 'поток'},
+        }
+        regressions = benchmarks.compare(results, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('запросов 3', regressions[0])
+        results['posts:index']['p95_ms'] = 13
+        self.assertEqual(len(benchmarks.compare(results, baseline, 0.2)), 2)
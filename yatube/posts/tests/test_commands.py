@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from api.models import Change
+from posts import counters
+from posts.models import (Comment, DroppedIndex, Follow, Group, Post,
+                          Suggestion)
+from posts.seeding import remove_indexes
+
+User = get_user_model()
+
+
+class ExportCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [Post.objects.create(author=cls.user, text=f'Пост {i}')
+                     for i in range(3)]
+        Comment.objects.create(author=cls.user, post=cls.posts[0],
+                               text='Комментарий')
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_ndjson', '--chunk-size', '1', stdout=out)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([record['id'] for record in records[:3]],
+                         [post.pk for post in ExportCommandTest.posts])
+        self.assertEqual(records[-1]['type'], 'comment')
+
+    def test_export_gzip_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson.gz')
+            call_command('export_ndjson', '--gzip', '--only', 'post',
+                         '--output', path)
+            with gzip.open(path, 'rt') as export:
+                self.assertEqual(len(export.readlines()), 3)
+
+    def test_gzip_requires_output(self):
+        with self.assertRaises(CommandError):
+            call_command('export_ndjson', '--gzip')
+
+
+class SeedCommandTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def index_names(self):
+        with connection.cursor() as cursor:
+            return set(connection.introspection.get_constraints(
+                cursor, Post._meta.db_table))
+
+    def test_seed_rebuilds_counters_and_suggestions(self):
+        call_command('seed', '--users', '20', '--groups', '2', '--posts',
+                     '60', '--comments', '30', '--follows', '80',
+                     '--batch-size', '25', '--drop-indexes',
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertIn('post_author_pub_date_idx', self.index_names())
+        self.assertEqual(
+            set(Change.objects.filter(model='post')
+                .values_list('object_id', flat=True)),
+            set(Post.objects.values_list('pk', flat=True)))
+        self.assertEqual(Change.objects.filter(model='comment').count(), 30)
+        self.assertEqual(cache.get(counters.all_key())[0], 60)
+        author_id = Post.objects.values_list('author_id', flat=True)[0]
+        self.assertEqual(cache.get(counters.author_key(author_id))[0],
+                         Post.objects.filter(author_id=author_id).count())
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Suggestion.objects.exists())
+
+    def test_import_export_round_trip(self):
+        user = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=user, group=group, text='Пост')
+        Comment.objects.create(author=user, post=post, text='Комментарий')
+        out = StringIO()
+        call_command('export_ndjson', stdout=out)
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.ndjson.gz')
+            with gzip.open(path, 'wt') as export:
+                export.write(out.getvalue())
+            changes = Change.objects.latest('pk').pk
+            for _ in range(2):
+                out = StringIO()
+                call_command('seed', '--import', path, stdout=out)
+        self.assertIn("'skipped': 2", out.getvalue())
+        # повторная загрузка ничего не добавляет ни в таблицы, ни в журнал
+        self.assertEqual(
+            list(Change.objects.filter(pk__gt=changes)
+                 .values_list('model', 'object_id', 'action')),
+            [('post', post.pk, Change.CREATED),
+             ('comment', post.comments.get().pk, Change.CREATED)])
+        imported = Post.objects.get(pk=post.pk)
+        self.assertEqual(imported.author.username, 'author')
+        self.assertEqual(imported.group.slug, 'group')
+        # DjangoJSONEncoder пишет время с точностью до миллисекунд
+        self.assertEqual(imported.pub_date, post.pub_date.replace(
+            microsecond=post.pub_date.microsecond // 1000 * 1000))
+        self.assertEqual(imported.comments.get().text, 'Комментарий')
+        self.assertFalse(imported.author.has_usable_password())
+
+    def test_import_conflicting_id_rejected(self):
+        user = User.objects.create_user(username='author')
+        post = Post.objects.create(author=user, text='Свой пост')
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as export:
+            for record in (
+                {'type': 'post', 'id': post.pk, 'text': 'Чужой пост',
+                 'pub_date': post.pub_date.isoformat(), 'author': 'author'},
+                {'type': 'comment', 'id': 1000, 'post': post.pk,
+                 'text': 'Комментарий', 'author': 'author',
+                 'created': post.pub_date.isoformat()},
+            ):
+                export.write(json.dumps(record) + '\n')
+            export.flush()
+            with self.assertRaisesMessage(CommandError, str(post.pk)):
+                call_command('seed', '--import', export.name,
+                             stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'Свой пост')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_interrupted_load_indexes_restored(self):
+        # загрузка прервалась после снятия индексов
+        removed = remove_indexes()
+        self.assertIn('post_author_pub_date_idx', removed)
+        self.assertNotIn('post_author_pub_date_idx', self.index_names())
+        out = StringIO()
+        call_command('seed', '--restore-indexes', stdout=out)
+        self.assertIn(f'Возвращено индексов: {len(removed)}',
+                      out.getvalue())
+        self.assertIn('post_author_pub_date_idx', self.index_names())
+        self.assertFalse(DroppedIndex.objects.exists())
+
+    def test_bad_import(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as export:
+            export.write('{"type": "like"}\n')
+            export.flush()
+            with self.assertRaises(CommandError):
+                call_command('seed', '--import', export.name,
+                             stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('seed')
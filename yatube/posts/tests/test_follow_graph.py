@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts.follow_graph import FollowGraph, follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.graph = FollowGraph()
+        self.graph.load([(1, 3), (1, 2), (2, 3)])
+        self.graph._version = self.graph._shared_version()
+
+    def test_queries(self):
+        self.assertTrue(self.graph.is_following(1, 2))
+        self.assertFalse(self.graph.is_following(2, 1))
+        self.assertEqual(list(self.graph.following_of(1)), [2, 3])
+        self.assertEqual(list(self.graph.followers_of(3)), [1, 2])
+        self.assertEqual(list(self.graph.followers_of(42)), [])
+
+    def test_add_and_remove(self):
+        self.graph.add(3, 1)
+        self.graph.add(3, 1)
+        self.graph.remove(1, 3)
+        self.assertEqual(list(self.graph.following_of(3)), [1])
+        self.assertEqual(list(self.graph.followers_of(3)), [2])
+
+    def other_process(self):
+        graph = FollowGraph()
+        graph.load([(1, 3), (1, 2), (2, 3)])
+        graph._version = self.graph._version
+        return graph
+
+    def test_changes_replayed_without_reload(self):
+        # SimpleTestCase упадёт, если граф полезет в базу
+        other = self.other_process()
+        self.graph.add(3, 1)
+        self.graph.remove_many([(1, 2)])
+        self.assertTrue(other.is_following(3, 1))
+        self.assertFalse(other.is_following(1, 2))
+        self.assertEqual(other._version, self.graph._version)
+
+    def test_concurrent_change_not_skipped(self):
+        other = self.other_process()
+        other.add(2, 1)
+        version = self.graph._version
+        self.graph.add(3, 1)
+        # перед своим изменением было чужое — локально ничего не трогаем
+        self.assertEqual(self.graph._version, version)
+        self.assertTrue(self.graph.is_following(2, 1))
+        self.assertTrue(self.graph.is_following(3, 1))
+        self.assertEqual(self.graph._version, version + 2)
+
+    def test_memory_usage(self):
+        self.assertGreater(self.graph.memory_usage(), 0)
+
+
+class FollowGraphViewsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='user')
+        self.author = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.profile_url = reverse('posts:profile',
+                                   kwargs={'username': 'author'})
+
+    def test_profile_reads_graph(self):
+        self.client.get(self.profile_url)
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.client.get(self.profile_url)
+        self.assertTrue(response.context['following'])
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': 'author'}))
+        response = self.client.get(self.profile_url)
+        self.assertFalse(response.context['following'])
+
+    def test_graph_loaded_once(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(follow_graph.is_following(self.user.pk,
+                                                  self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(list(follow_graph.followers_of(self.author.pk)),
+                             [self.user.pk])
+
+    def test_stale_version_reloads(self):
+        follow_graph.is_following(self.user.pk, self.author.pk)
+        Follow.objects.bulk_create([Follow(user=self.user,
+                                           author=self.author)])
+        self.assertFalse(follow_graph.is_following(self.user.pk,
+                                                   self.author.pk))
+        follow_graph._bump_version()
+        self.assertTrue(follow_graph.is_following(self.user.pk,
+                                                  self.author.pk))
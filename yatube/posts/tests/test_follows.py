@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.follow_graph import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class BulkFollowTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.user = User.objects.create_user(username='user')
+        self.authors = [User.objects.create_user(username=f'author{i}')
+                        for i in range(3)]
+        self.api_client = APIClient()
+        self.api_client.force_authenticate(self.user)
+
+    def following(self):
+        return sorted(Follow.objects.filter(user=self.user)
+                      .values_list('author__username', flat=True))
+
+    def test_api_follow_is_idempotent(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        usernames = ['author0', 'author1', 'user', 'ghost']
+        # поиск авторов, вставка, пересчёт подсказок — с BEGIN на запись
+        with self.assertNumQueries(5):
+            response = self.api_client.post('/api/v1/follow/',
+                                            {'usernames': usernames},
+                                            format='json')
+        self.assertEqual(response.json(), {'followed': ['author0', 'author1'],
+                                           'missing': ['ghost']})
+        self.assertEqual(self.following(), ['author0', 'author1'])
+        self.assertTrue(follow_graph.is_following(self.user.pk,
+                                                  self.authors[1].pk))
+
+    def test_api_unfollow(self):
+        Follow.objects.bulk_create([Follow(user=self.user, author=author)
+                                    for author in self.authors])
+        response = self.api_client.post('/api/v1/unfollow/',
+                                        {'usernames': ['author0', 'author2']},
+                                        format='json')
+        self.assertEqual(response.json()['unfollowed'],
+                         ['author0', 'author2'])
+        self.assertEqual(self.following(), ['author1'])
+        self.assertFalse(follow_graph.is_following(self.user.pk,
+                                                   self.authors[0].pk))
+
+    def test_api_validation(self):
+        response = self.api_client.post('/api/v1/follow/', {'usernames': []},
+                                        format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_html_views(self):
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('posts:bulk_follow'),
+                               {'username': ['author1', 'author2']})
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertEqual(self.following(), ['author1', 'author2'])
+        client.post(reverse('posts:bulk_unfollow'), {'username': ['author1']})
+        self.assertEqual(self.following(), ['author2'])
+        self.assertEqual(client.get(reverse('posts:bulk_follow')).status_code,
+                         405)
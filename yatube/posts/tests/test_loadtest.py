@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+
+from posts import loadtest
+from posts.models import Comment
+from posts.seeding import seed
+
+User = get_user_model()
+
+
+class LoadTestTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_run_in_process(self):
+        seed(users=10, groups=2, posts=40, comments=20, follows=10)
+        result = loadtest.run(workers=2, duration=30, requests=60,
+                              throttle=False)
+        total = result['total']
+        self.assertEqual(total['requests'], 60)
+        self.assertEqual(total['errors'], 0, total['statuses'])
+        self.assertLessEqual(total['p50_ms'], total['p99_ms'])
+        self.assertIn('feed', result['kinds'])
+        self.assertIn('итого', loadtest.report(result))
+        self.assertNotIn('comment', result['kinds'])
+        self.assertNotIn('follow', result['kinds'])
+        self.assertFalse(Comment.objects.filter(
+            text='Комментарий под нагрузкой').exists())
+
+    def test_credentials_removed_after_run(self):
+        seed(users=10, groups=2, posts=40, comments=20, follows=10)
+        User.objects.update(is_staff=True)
+        User.objects.create_user(username='reader')
+        result = loadtest.run(workers=2, duration=30, requests=40,
+                              throttle=False, writes=True)
+        self.assertTrue(result['writes'])
+        self.assertFalse(Token.objects.exists())
+        self.assertFalse(Session.objects.exists())
+        # от имени сотрудников ничего не пишется
+        self.assertFalse(Comment.objects.filter(
+            text='Комментарий под нагрузкой', author__is_staff=True).exists())
+
+    def test_summarize_counts_errors(self):
+        summary = loadtest.summarize([0.01, 0.02, 0.03, 0.04],
+                                     {200: 1, 302: 1, 429: 1, 'error': 1}, 2)
+        self.assertEqual(summary['rps'], 2)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throttled'], 1)
+        self.assertEqual(summary['p50_ms'], 30)
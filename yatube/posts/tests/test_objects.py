@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from posts.models import Group, Post
+from posts.objects import group_cache, post_cache
+
+User = get_user_model()
+
+
+class ObjectCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author',
+                                             first_name='Лев')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.post = Post.objects.create(author=self.user, text='Пост',
+                                        group=self.group)
+
+    def test_read_through_with_related(self):
+        post_cache.get(pk=self.post.pk)
+        hits = post_cache.stats()['hits']
+        with self.assertNumQueries(0):
+            post = post_cache.get(pk=str(self.post.pk))
+            self.assertEqual(post.author.first_name, 'Лев')
+            self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post_cache.stats()['hits'], hits + 1)
+        self.assertIsNone(post_cache.get(pk='abc'))
+
+    def test_multi_get(self):
+        other = Post.objects.create(author=self.user, text='Другой')
+        post_cache.get(pk=self.post.pk)
+        misses = post_cache.stats()['misses']
+        with self.assertNumQueries(1):
+            posts = post_cache.get_many([self.post.pk, other.pk, 999])
+        self.assertEqual(set(posts), {self.post.pk, other.pk})
+        self.assertEqual(post_cache.stats()['misses'], misses + 2)
+
+    def test_save_and_delete_invalidate(self):
+        post_cache.get(pk=self.post.pk)
+        group_cache.get(slug='group')
+        self.post.text = 'Изменённый'
+        self.post.save()
+        self.assertEqual(post_cache.get(pk=self.post.pk).text, 'Изменённый')
+        self.group.slug = 'new-group'
+        self.group.save()
+        self.assertIsNone(group_cache.get(slug='group'))
+        self.assertEqual(group_cache.get(slug='new-group'), self.group)
+        self.group.delete()
+        self.assertIsNone(post_cache.get(pk=self.post.pk).group)
+        self.post.delete()
+        self.assertIsNone(post_cache.get(pk=self.post.pk))
+
+    def test_views_use_cache(self):
+        client = Client()
+        api_client = APIClient()
+        api_client.force_authenticate(self.user)
+        urls = [
+            (client, reverse('posts:post_detail', args=[self.post.pk])),
+            (client, reverse('posts:group_list', args=['group'])),
+            (api_client, f'/api/v1/posts/{self.post.pk}/'),
+            (api_client, f'/api/v1/groups/{self.group.pk}/'),
+        ]
+        for client, url in urls:
+            client.get(url)
+            with self.subTest(url=url):
+                hits = post_cache.hits + group_cache.hits
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(post_cache.hits + group_cache.hits, hits)
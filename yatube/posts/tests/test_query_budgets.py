@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from posts import benchmarks
+from posts.follow_graph import follow_graph
+from posts.models import Comment, Follow, Group, Post, User
+from posts.query_budgets import BUDGETS
+
+SIZES = (2, 15)
+
+
+def build(size):
+    """Данные, в которых каждая страница и список растут вместе с size."""
+    user = User.objects.create_user(username=f'reader{size}',
+                                    password=benchmarks.PASSWORD)
+    author = User.objects.create_user(username=f'author{size}')
+    group = Group.objects.create(title='Группа', slug=f'group{size}',
+                                 description='Описание')
+    others = [User.objects.create_user(username=f'user{size}_{index}')
+              for index in range(size)]
+    posts = [Post.objects.create(author=post_author, text='Пост',
+                                 group=group)
+             for post_author in [author] * size + others]
+    for post_author in [author] + others:
+        Follow.objects.create(user=user, author=post_author)
+    for comment_author in others:
+        Comment.objects.create(post=posts[0], author=comment_author,
+                               text='Комментарий')
+    return {
+        'user': user,
+        'author': author,
+        'group': group,
+        'post': posts[0],
+        'comment': posts[0].comments.first(),
+        'own_post': Post.objects.create(author=user, text='Свой пост'),
+        'usernames': [other.username for other in others],
+        'post_ids': ','.join(str(post.pk) for post in posts),
+    }
+
+
+@override_settings(THROTTLE_RATES={})
+class QueryBudgetTest(TestCase):
+    def count_queries(self, size):
+        data = build(size)
+        clients = benchmarks.make_clients(data['user'])
+        counts = {}
+        for case in benchmarks.CASES:
+            client = clients[case.client]
+            url = case.url(data)
+            cache.clear()
+            follow_graph.reset()
+            with CaptureQueriesContext(connection) as context:
+                if case.method == 'get':
+                    response = client.get(
+                        url, benchmarks.query_params(case, data))
+                else:
+                    response = client.post(url, case.data(data))
+            self.assertLess(response.status_code, 400, url)
+            counts[benchmarks.case_key(case)] = len(
+                context.captured_queries)
+        return counts
+
+    def test_every_case_has_budget(self):
+        keys = {benchmarks.case_key(case) for case in benchmarks.CASES}
+        self.assertEqual(keys, set(BUDGETS))
+
+    def test_queries_within_budget_and_constant(self):
+        small, large = (self.count_queries(size) for size in SIZES)
+        for key, budget in BUDGETS.items():
+            with self.subTest(url=key):
+                self.assertEqual(large[key], small[key],
+                                 'число запросов растёт вместе с данными')
+                self.assertLessEqual(large[key], budget)
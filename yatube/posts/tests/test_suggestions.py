@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase)
+from django.urls import reverse
+
+from posts.follow_graph import FollowGraph, follow_graph
+from posts.models import Follow, StaleSuggestion, Suggestion
+from posts.suggestions import score_user
+
+User = get_user_model()
+
+
+class ScoreTest(SimpleTestCase):
+    def test_friends_of_friends_and_cofollows(self):
+        graph = FollowGraph()
+        graph.load([(1, 2), (2, 3), (2, 4), (5, 2), (5, 6), (1, 3)])
+        graph._version = graph._shared_version()
+        scores = dict(score_user(1, graph))
+        self.assertNotIn(1, scores)
+        self.assertNotIn(2, scores)
+        self.assertNotIn(3, scores)
+        self.assertEqual(scores[4], 1.5)
+        self.assertEqual(scores[6], 0.5)
+
+
+class SuggestionViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.author = User.objects.create_user(username='author')
+        Follow.objects.bulk_create([
+            Follow(user=cls.user, author=cls.friend),
+            Follow(user=cls.friend, author=cls.author),
+        ])
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.client = Client()
+        self.client.force_login(SuggestionViewsTest.user)
+
+    def test_command_stores_suggestions(self):
+        call_command('refresh_suggestions', stdout=StringIO())
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=SuggestionViewsTest.user)
+                 .values_list('author__username', flat=True)),
+            ['author'],
+        )
+
+    def test_pages_show_suggestions(self):
+        call_command('refresh_suggestions', stdout=StringIO())
+        urls = [
+            reverse('posts:follow_index'),
+            reverse('posts:profile', kwargs={'username': 'user'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    [suggestion.author for suggestion in
+                     response.context['suggestions']],
+                    [SuggestionViewsTest.author],
+                )
+
+
+class StaleSuggestionsTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        follow_graph.reset()
+        self.user, self.friend, self.author, self.fan = [
+            User.objects.create_user(username=name)
+            for name in ('user', 'friend', 'author', 'fan')]
+        Follow.objects.create(user=self.user, author=self.friend)
+        Follow.objects.create(user=self.fan, author=self.author)
+        call_command('refresh_suggestions', stdout=StringIO())
+
+    def test_follow_marks_two_hop_users(self):
+        Follow.objects.create(user=self.friend, author=self.author)
+        # пересчёт не происходит в запросе — подсказки только помечены
+        self.assertFalse(Suggestion.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            set(StaleSuggestion.objects.values_list('user_id', flat=True)),
+            {self.friend.pk, self.user.pk, self.fan.pk})
+        call_command('refresh_suggestions', '--stale', stdout=StringIO())
+        self.assertFalse(StaleSuggestion.objects.exists())
+        self.assertEqual(
+            list(Suggestion.objects.filter(user=self.user)
+                 .values_list('author__username', flat=True)),
+            ['author'])
@@ -83,6 +83,21 @@ class CacheTest(TestCase):
         Post.objects.filter(pk=1).delete()
         self.assertIn(self.post, response.context['page_obj'])
 
+    def test_group_counts_after_move(self):
+        # счётчики по pk групп не должны достаться следующим тестам
+        self.addCleanup(cache.clear)
+        old = Group.objects.create(title='Старая', slug='old')
+        new = Group.objects.create(title='Новая', slug='new')
+        self.post.group = old
+        self.post.save()
+        url = reverse('posts:group_list', args=['old'])
+        self.assertEqual(
+            self.client.get(url).context['page_obj'].paginator.count, 1)
+        self.post.group = new
+        self.post.save()
+        self.assertEqual(
+            self.client.get(url).context['page_obj'].paginator.count, 0)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -12,6 +12,9 @@ urlpatterns = [
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.profile_bulk_follow, name='bulk_follow'),
+    path('unfollow/bulk/', views.profile_bulk_unfollow,
+         name='bulk_unfollow'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
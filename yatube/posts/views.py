@@ -1,73 +1,95 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
 
+from core.objects import Attached
+from core.throttling import throttle
+from users.identity import get_user_or_404
+
+from . import counters, tags
+from .archive import AuthorPosts
+from .follow_graph import follow_graph
+from .follows import bulk_follow, bulk_unfollow
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Follow
+from .models import Post, Follow
+from .objects import archived_post_cache, group_cache, post_cache
+from .suggestions import suggestions_for
 
 OUT_LIMIT = 10
 
 
-def pagination_func(objects, request):
+def pagination_func(objects, request, count_key=None):
     paginator = Paginator(objects, OUT_LIMIT)
+    if count_key:
+        paginator.count = counters.count_posts(count_key, objects)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = Attached(post_cache, page_obj.object_list)
     return page_obj
 
 
 def index(request):
     posts = Post.objects.all()
     context = {
-        'page_obj': pagination_func(posts, request),
+        'page_obj': pagination_func(posts, request, counters.all_key()),
         'title': 'Последние обновления на сайте',
+        'cache_tags': [tags.FEED],
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = group_cache.get_or_404(slug=slug)
     posts = group.posts.all().order_by('-pub_date')
     context = {
         'title': f'Записи сообщества {group}',
-        'page_obj': pagination_func(posts, request),
+        'page_obj': pagination_func(posts, request,
+                                    counters.group_key(group.pk)),
         'group': group,
+        'cache_tags': [tags.group_tag(group.slug)],
     }
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    count = posts.count()
+    user = get_user_or_404(username)
+    page_obj = pagination_func(AuthorPosts(user.pk), request)
     following = (request.user.is_authenticated
-                 and Follow.objects.filter(user=request.user).
-                 filter(author=user).exists())
+                 and follow_graph.is_following(request.user.pk, user.pk))
     context = {
         'author': user,
-        'page_obj': pagination_func(posts, request),
-        'count': count,
+        'page_obj': page_obj,
+        'count': page_obj.paginator.count,
         'following': following,
-        'page_author': user
+        'page_author': user,
+        'suggestions': suggestions_for(request.user),
+        'cache_tags': [tags.author_tag(user.pk)],
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = post_cache.get(pk=post_id)
+    archived = post is None
+    if archived:
+        post = archived_post_cache.get_or_404(pk=post_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    author = post.author
-    count = author.posts.count()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
-        'count': count,
+        'archived': archived,
+        'count': AuthorPosts(post.author_id).count(),
         'form': form,
         'comments': comments,
+        'cache_tags': [tags.post_tag(post.pk),
+                       tags.author_tag(post.author_id)],
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@throttle('write', methods=['POST'])
 def post_create(request):
     form = PostForm(request.POST or None,
                     files=request.FILES or None, )
@@ -85,8 +107,9 @@ def post_create(request):
 
 
 @login_required
+@throttle('write', methods=['POST'])
 def post_edit(request, post_id):
-    instance = get_object_or_404(Post, id=post_id)
+    instance = post_cache.get_or_404(pk=post_id)
     if request.user != instance.author:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(request.POST or None,
@@ -103,8 +126,9 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('write')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = post_cache.get_or_404(pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -117,20 +141,48 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     posts = Post.objects.filter(author__following__user=request.user)
-    context = {'page_obj': pagination_func(posts, request)}
+    page_obj = pagination_func(posts, request)
+    # новые и удалённые посты сбрасывают follow-тег подписчиков автора,
+    # правки и переименования — теги авторов, чьи посты на странице
+    authors = set(page_obj.object_list.queryset.values_list(
+        'author_id', flat=True))
+    context = {
+        'page_obj': page_obj,
+        'suggestions': suggestions_for(request.user),
+        'cache_tags': [tags.follow_tag(request.user.pk)]
+        + [tags.author_tag(author_id) for author_id in authors],
+    }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@throttle('write')
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:profile', username=request.user.username)
 
 
 @login_required
+@throttle('write')
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     Follow.objects.filter(user=request.user).filter(author=author).delete()
     return redirect('posts:profile', username=request.user.username)
+
+
+@login_required
+@require_POST
+@throttle('write')
+def profile_bulk_follow(request):
+    bulk_follow(request.user, request.POST.getlist('username')[:500])
+    return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+@throttle('write')
+def profile_bulk_unfollow(request):
+    bulk_unfollow(request.user, request.POST.getlist('username')[:500])
+    return redirect('posts:follow_index')
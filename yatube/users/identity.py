@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import Http404
+
+from core.objects import ObjectCache
+
+User = get_user_model()
+
+FIELDS = ('id', 'username', 'first_name', 'last_name', 'is_active')
+CACHE_TTL = getattr(settings, 'USER_IDENTITY_CACHE_TTL', 600)
+
+# Остальные поля подгружаются из базы при обращении, как у only().
+user_cache = ObjectCache(User, 'user', lookups=('username',), fields=FIELDS,
+                         ttl=CACHE_TTL)
+
+
+def remember(user):
+    user_cache.remember(user)
+
+
+def forget(user):
+    user_cache.forget(user)
+
+
+def get_users(ids):
+    """Словарь id -> пользователь с полями FIELDS, промахи одним запросом."""
+    return user_cache.get_many(ids)
+
+
+def get_user(pk):
+    return user_cache.get(pk=pk)
+
+
+def get_user_by_username(username):
+    return user_cache.get(username=username)
+
+
+def get_user_or_404(username):
+    user = get_user_by_username(username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
@@ -0,0 +1,10 @@
+from django import template
+
+from users.identity import get_user
+
+register = template.Library()
+
+
+@register.filter
+def identity(user_id):
+    return get_user(user_id)
@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from users.identity import get_user_by_username, get_user_or_404, get_users
+
+User = get_user_model()
+
+
+def user_queries(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'FROM "auth_user"' in query['sql']]
+
+
+class IdentityCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author',
+                                             first_name='Лев',
+                                             last_name='Толстой')
+
+    def test_cached_lookup(self):
+        get_user_by_username('author')
+        with self.assertNumQueries(0):
+            user = get_user_by_username('author')
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.get_full_name(), 'Лев Толстой')
+
+    def test_rename_and_delete_invalidate(self):
+        get_user_by_username('author')
+        self.user.username = 'writer'
+        self.user.save()
+        self.assertIsNone(get_user_by_username('author'))
+        self.assertEqual(get_user_by_username('writer'), self.user)
+        self.user.delete()
+        with self.assertRaises(Http404):
+            get_user_or_404('writer')
+
+    def test_multi_get(self):
+        other = User.objects.create_user(username='other')
+        get_users([self.user.pk])
+        with self.assertNumQueries(1):
+            users = get_users([self.user.pk, other.pk, 999])
+        self.assertEqual(set(users), {self.user.pk, other.pk})
+
+    def test_views_resolve_without_user_queries(self):
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        Post.objects.bulk_create([Post(author=self.user, text=str(i),
+                                       group=group) for i in range(3)])
+        client = Client()
+        urls = [reverse('posts:profile', kwargs={'username': 'author'}),
+                reverse('posts:group_list', kwargs={'slug': 'group'})]
+        for url in urls:
+            client.get(url)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                self.assertEqual(user_queries(context), [])
+                self.assertContains(response, 'Лев Толстой')
@@ -1,4 +1,8 @@
+import atexit
 import os
+import shutil
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -26,7 +30,7 @@ INSTALLED_APPS = [
     'sorl.thumbnail',
     'rest_framework',
     'rest_framework.authtoken',
-    'api',
+    'api.apps.ApiConfig',
     'debug_toolbar',
 
 ]
@@ -37,16 +41,45 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-    ]
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+}
+
+API_TOKEN_CACHE_TTL = 300
+
+API_TOKEN_LOCAL_TTL = 5
+
+API_TOKEN_LOCAL_SIZE = 1024
+
+SSE_RING_SIZE = 1000
+
+SSE_HEARTBEAT = 15
+
+SSE_POLL_INTERVAL = 1
+
+SSE_MAX_DURATION = 300
+
+SSE_SHARED_LOG = True
+
+THROTTLE_RATES = {
+    'write': '60/min',
+    'list': '300/min',
+    'search': '120/min',
 }
 
 MIDDLEWARE = [
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -125,10 +158,48 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'cache.sqlite3'),
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TTL': 60,
+            'SYNC_INTERVAL': 0.5,
+        },
     }
 }
 
+SESSION_ENGINE = 'core.sessions'
+
+SESSION_WRITE_BEHIND = 300
+
+SESSION_CLEANUP_BATCH = 500
+
+METRICS_DIR = os.path.join(BASE_DIR, 'cache', 'metrics')
+
+METRICS_FLUSH_INTERVAL = 1
+
+# За прокси на том же хосте любой запрос приходит с 127.0.0.1, поэтому
+# по умолчанию /metrics открыт только сотрудникам.
+METRICS_ALLOWED_IPS = []
+
+SLOW_QUERY_THRESHOLD = 0.1
+
+SLOW_QUERY_SAMPLES = 100
+
+PROFILE_SAMPLE_RATE = 0
+
+PROFILE_KEEP = 500
+
+# Тесты получают свои файлы кэша и метрик: общий кэш работающего
+# сервера они не очищают и не оставляют в нём объекты из тестовой базы.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+if TESTING:
+    TEST_DIR = tempfile.mkdtemp(prefix='yatube-test-')
+    atexit.register(shutil.rmtree, TEST_DIR, ignore_errors=True)
+    CACHES['default']['LOCATION'] = os.path.join(TEST_DIR, 'cache.sqlite3')
+    METRICS_DIR = os.path.join(TEST_DIR, 'metrics')
+
 INTERNAL_IPS = [
     '127.0.0.1',
     'localhost',